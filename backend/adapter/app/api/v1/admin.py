@@ -1,9 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Query
 from app.models.schemas import AdminUsersResponse, UserStats
 from app.core.auth import verify_jwt
 from app.services.graphiti_client import graphiti_client
 from app.services.reprocessing_service import reprocessing_service
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 router = APIRouter()
 
@@ -13,35 +13,12 @@ async def get_users(username: str = Depends(verify_jwt)):
     """Get list of all users with their episode counts"""
     try:
         # Query Neo4j to get unique users from episodes
-        # Graphiti stores episodes with source_description like "api (user)" or "n8n (user)"
-        # We extract user_id from episode names which follow pattern: {user_id}_{timestamp}
-
-        # Extract user_id from episode names. Patterns:
-        # - Regular: "35145416_2026-01-11T09:21:50" -> user_id = "35145416"
-        # - Crypto: "ETH_USDT_2026-01-17T10:05:15" -> user_id = "ETH_USDT"
-        #
-        # Strategy: Find last underscore before 4-digit year and take everything before it
-        # Pure Cypher implementation (no APOC required)
+        # Episodes are scoped to their user by group_id, which Graphiti sets to
+        # the user_id on every episode (older ones are backfilled at startup)
         query = """
         MATCH (e:Episodic)
-        WHERE e.name IS NOT NULL AND e.name =~ '.*_\\d{4}-.*'
-        
-        // Split by underscore
-        WITH e, split(e.name, '_') AS parts, e.created_at as created_at
-        
-        // Find which part is the timestamp (starts with 4-digit year)
-        WITH e, parts, created_at,
-             [i IN range(0, size(parts)-1) WHERE parts[i] =~ '^\\d{4}-.*' | i][0] AS timestamp_idx
-        
-        // user_id is all parts before timestamp_idx joined with underscore
-        WITH created_at,
-             reduce(s = '', i IN range(0, timestamp_idx-1) | 
-                 CASE WHEN s = '' THEN parts[i] ELSE s + '_' + parts[i] END
-             ) AS user_id
-        
-        WHERE user_id IS NOT NULL AND user_id <> ''
-        
-        WITH user_id, count(*) AS episodes_count, max(created_at) as last_updated
+        WHERE e.group_id IS NOT NULL AND e.group_id <> ''
+        WITH e.group_id AS user_id, count(*) AS episodes_count, max(e.created_at) as last_updated
         RETURN user_id, episodes_count, last_updated
         ORDER BY episodes_count DESC
         """
@@ -106,7 +83,10 @@ async def delete_user(user_id: str, username: str = Depends(verify_jwt)):
 
 @router.get("/users/{user_id}/episodes")
 async def get_user_episodes(
-    user_id: str, limit: int = None, username: str = Depends(verify_jwt)
+    user_id: str,
+    limit: int = None,
+    include_content: bool = True,
+    username: str = Depends(verify_jwt),
 ):
     """
     Get list of episodes for a user
@@ -114,8 +94,11 @@ async def get_user_episodes(
     Args:
         user_id: User identifier
         limit: Optional limit on number of episodes to return (most recent first)
+        include_content: Set to false to list episode metadata only
     """
-    episodes = await graphiti_client.get_user_episodes(user_id, limit=limit)
+    episodes = await graphiti_client.get_user_episodes(
+        user_id, limit=limit, include_content=include_content
+    )
     return {"episodes": episodes, "total": len(episodes)}
 
 
@@ -158,12 +141,17 @@ async def get_user_files(user_id: str, username: str = Depends(verify_jwt)):
 
 @router.delete("/users/{user_id}/files")
 async def delete_user_file(
-    user_id: str, file_name: str, username: str = Depends(verify_jwt)
+    user_id: str,
+    file_name: List[str] = Query(...),
+    username: str = Depends(verify_jwt),
 ):
-    """Delete all chunks related to a file"""
-    success = await graphiti_client.delete_file_episodes(user_id, file_name)
+    """Delete all chunks related to one or more files (repeat file_name)"""
+    success = await graphiti_client.delete_files_episodes(user_id, file_name)
     if success:
-        return {"ok": True, "message": f"File {file_name} deleted successfully"}
+        return {
+            "ok": True,
+            "message": f"File {', '.join(file_name)} deleted successfully",
+        }
     else:
         raise HTTPException(status_code=500, detail="Failed to delete file")
 
@@ -235,6 +223,8 @@ async def restore_user_backup(
         response = await backup_service.restore_backup(
             archive_bytes, replace=replace, new_user_id=new_user_id
         )
+        graphiti_client.invalidate_user(response.user_id)
+        await graphiti_client.bump_graph_version(response.user_id)
 
         return response
     except Exception as e:
@@ -300,3 +290,39 @@ async def reprocess_all_users(username: str = Depends(verify_jwt)):
         raise HTTPException(
             status_code=500, detail=f"Failed to reprocess all users: {str(e)}"
         )
+
+
+@router.post("/reprocess/{user_id}/queue")
+async def queue_user_reprocessing(user_id: str, username: str = Depends(verify_jwt)):
+    """
+    Queue reprocessing of a user's episodes on the RQ worker
+
+    Returns immediately. Each episode runs as its own RQ job, chained to
+    the previous one so a user's episodes are reprocessed one at a time.
+
+    Args:
+        user_id: User ID to reprocess
+
+    Returns:
+        Batch id to poll, and the number of queued episodes
+    """
+    try:
+        return await reprocessing_service.enqueue_user(user_id)
+    except Exception as e:
+        import logging
+
+        logging.getLogger("app.api.v1.admin").error(
+            f"Error queueing reprocessing for user {user_id}: {e}", exc_info=True
+        )
+        raise HTTPException(
+            status_code=500, detail=f"Failed to queue reprocessing: {str(e)}"
+        )
+
+
+@router.get("/reprocess/batches/{batch_id}")
+async def get_reprocessing_batch(batch_id: str, username: str = Depends(verify_jwt)):
+    """Progress of a queued reprocessing batch"""
+    status = await reprocessing_service.get_batch_status(batch_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return status
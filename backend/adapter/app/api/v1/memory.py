@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query
 from app.models.schemas import (
     MemoryAppendRequest, MemoryAppendResponse,
     MemoryQueryRequest, MemoryQueryResponse,
@@ -9,6 +9,7 @@ from app.core.auth import get_api_key
 from app.services.graphiti_client import graphiti_client
 from app.services.worker_tasks import process_episode
 from datetime import datetime
+from typing import List
 import uuid
 import logging
 
@@ -128,6 +129,7 @@ async def summarize_memory(
 async def get_user_episodes(
     user_id: str,
     limit: int = None,
+    include_content: bool = True,
     api_key: str = Depends(get_api_key)
 ):
     """
@@ -136,9 +138,10 @@ async def get_user_episodes(
     Args:
         user_id: User identifier
         limit: Optional limit on number of episodes to return (most recent first)
+        include_content: Set to false to list episode metadata only
     """
     try:
-        episodes = await graphiti_client.get_user_episodes(user_id, limit=limit)
+        episodes = await graphiti_client.get_user_episodes(user_id, limit=limit, include_content=include_content)
         return {"episodes": episodes, "total": len(episodes)}
     except Exception as e:
         logger.error(f"Error getting episodes for user {user_id}: {e}")
@@ -147,18 +150,20 @@ async def get_user_episodes(
 @router.delete("/files")
 async def delete_file(
     user_id: str,
-    file_name: str,
+    file_name: List[str] = Query(...),
     api_key: str = Depends(get_api_key)
 ):
     """
-    Delete all episodes and associated orphaned data for a specific file
+    Delete all episodes and associated orphaned data for one or more files
+    (repeat file_name to delete several in one call)
     """
     try:
-        success = await graphiti_client.delete_file_episodes(user_id, file_name)
+        success = await graphiti_client.delete_files_episodes(user_id, file_name)
+        names = "', '".join(file_name)
         if success:
-            return {"ok": True, "message": f"Successfully deleted all data related to file '{file_name}' for user {user_id}"}
+            return {"ok": True, "message": f"Successfully deleted all data related to file '{names}' for user {user_id}"}
         else:
-            raise HTTPException(status_code=500, detail=f"Failed to delete data for file '{file_name}'")
+            raise HTTPException(status_code=500, detail=f"Failed to delete data for file '{names}'")
     except Exception as e:
         logger.error(f"Error in delete_file: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -10,6 +10,9 @@ class Settings(BaseSettings):
     NEO4J_URI: str
     NEO4J_USER: str
     NEO4J_PASSWORD: str
+    # Bolt connections kept per process, and seconds a query may wait for one
+    NEO4J_POOL_SIZE: int = 100
+    NEO4J_ACQUISITION_TIMEOUT: float = 60
     
     # Redis
     REDIS_URL: str
@@ -23,6 +26,13 @@ class Settings(BaseSettings):
     LLM_FAST_BASE_URL: str
     LLM_FAST_API_KEY: str
     LLM_FAST_MODEL: str = "qwen2.5:7b"
+
+    # Requests per minute across both LLMs (0 = unlimited)
+    LLM_RPM: int = 0
+    # Total seconds to keep retrying a failed LLM request
+    LLM_RETRY_TIMEOUT: float = 30
+    # Seconds before the first LLM retry, doubled on each further attempt
+    LLM_RETRY_BASE_DELAY: float = 1.0
     
     # Embeddings
     EMBEDDING_BASE_URL: str
@@ -33,6 +43,16 @@ class Settings(BaseSettings):
     RERANKER_BASE_URL: str
     RERANKER_API_KEY: str
     RERANKER_MODEL: str = "reranker-001"
+    # Results to request per rerank call (0 = all passages). Keep it at least
+    # as large as the search limit.
+    RERANKER_TOP_N: int = 0
+
+    # Search cache: reuse results of a cached query whose embedding has at
+    # least this cosine similarity (0 = exact-match cache only)
+    SEARCH_SEMANTIC_CACHE_THRESHOLD: float = 0
+
+    # Users reprocessed in parallel by /admin/reprocess-all
+    REPROCESS_CONCURRENCY: int = 4
     
     # Adapter
     ADAPTER_API_KEY: str
@@ -84,9 +84,17 @@ async def retry_pending_episodes_loop():
 
 @app.on_event("startup")
 async def startup_event():
+    # Create missing Neo4j indexes without blocking startup on the database
+    asyncio.create_task(graphiti_client.ensure_indexes())
+    asyncio.create_task(graphiti_client.backfill_episode_group_ids())
     # Start the background retry loop
     asyncio.create_task(retry_pending_episodes_loop())
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Release the Neo4j, reranker and Redis connection pools
+    await graphiti_client.close()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -25,16 +25,16 @@ from app.models.schemas import BackupMetadata, RestoreResponse
 
 logger = logging.getLogger(__name__)
 
-# Create unpatched JSON decoder/encoder instances
+# Dedicated JSON decoder/encoder instances
 _json_decoder = JSONDecoder()
 _json_encoder = JSONEncoder(indent=2, ensure_ascii=False)
 
 def _safe_json_loads(s):
-    """Load JSON without going through patched json.loads"""
+    """Load JSON with a dedicated strict decoder"""
     return _json_decoder.decode(s)
 
 def _safe_json_dumps(obj):
-    """Dump JSON without going through patched json.dumps"""
+    """Dump JSON with the backup encoder (indented, non-ASCII preserved)"""
     return _json_encoder.encode(obj)
 
 
@@ -48,7 +48,7 @@ class BackupService:
         """Export all episodes for a user"""
         query = """
         MATCH (e:Episodic)
-        WHERE e.name STARTS WITH $user_prefix
+        WHERE e.group_id = $user_id
         RETURN e {
             .*,
             created_at: toString(e.created_at),
@@ -63,7 +63,7 @@ class BackupService:
         """
         
         async with self.driver.session() as session:
-            result = await session.run(query, user_prefix=f"{user_id}_")
+            result = await session.run(query, user_id=user_id)
             records = await result.data()
         
         episodes = [record["episode"] for record in records]
@@ -74,7 +74,7 @@ class BackupService:
         """Export all entities connected to user episodes"""
         query = """
         MATCH (e:Episodic)
-        WHERE e.name STARTS WITH $user_prefix
+        WHERE e.group_id = $user_id
         MATCH (e)-[:MENTIONS]->(entity:Entity)
         WITH DISTINCT entity
         RETURN entity {
@@ -84,7 +84,7 @@ class BackupService:
         """
         
         async with self.driver.session() as session:
-            result = await session.run(query, user_prefix=f"{user_id}_")
+            result = await session.run(query, user_id=user_id)
             records = await result.data()
         
         entities = [record["entity"] for record in records]
@@ -95,7 +95,7 @@ class BackupService:
         """Export all relationship edges for user"""
         query = """
         MATCH (e:Episodic)
-        WHERE e.name STARTS WITH $user_prefix
+        WHERE e.group_id = $user_id
         MATCH (e)-[:MENTIONS]->(entity1:Entity)
         MATCH (entity1)-[r:RELATES_TO]-(entity2:Entity)
         WITH DISTINCT r, entity1, entity2
@@ -123,7 +123,7 @@ class BackupService:
         """
         
         async with self.driver.session() as session:
-            result = await session.run(query, user_prefix=f"{user_id}_")
+            result = await session.run(query, user_id=user_id)
             records = await result.data()
         
         edges = [record["edge"] for record in records]
@@ -263,6 +263,11 @@ class BackupService:
                     if episode.get('group_id') == original_user_id:
                         episode['group_id'] = new_user_id
             
+            # Episodes are scoped to their user by group_id; older backups may lack it
+            for episode in episodes:
+                if not episode.get('group_id'):
+                    episode['group_id'] = target_user_id
+            
             # Import data - ALWAYS use merge=True for safety
             stats = await self._import_data(target_user_id, episodes, entities, edges, merge=True)
             
@@ -290,7 +295,7 @@ class BackupService:
         query = """
         // Delete episodes
         MATCH (e:Episodic)
-        WHERE e.name STARTS WITH $user_prefix
+        WHERE e.group_id = $user_id
         DETACH DELETE e
         
         // Delete orphaned entities
@@ -303,7 +308,7 @@ class BackupService:
         """
         
         async with self.driver.session() as session:
-            await session.run(query, user_prefix=f"{user_id}_")
+            await session.run(query, user_id=user_id)
         
         logger.info(f"Deleted existing data for user {user_id}")
     
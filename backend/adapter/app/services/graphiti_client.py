@@ -5,10 +5,34 @@ This module provides a wrapper around the graphiti-core Python SDK for
 building and querying temporal knowledge graphs.
 """
 
+import asyncio
 import logging
+import os
+import time
 import uuid
+from collections import OrderedDict, defaultdict
+from operator import attrgetter, itemgetter, mul
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timezone, timedelta
+
+
+def _configure_env():
+    """
+    Set Graphiti tuning env vars once, at import. graphiti_core reads
+    SEMAPHORE_LIMIT when it is imported, so this must run before that.
+    """
+    # Set SEMAPHORE_LIMIT for Graphiti's internal concurrency control
+    # This allows parallel LLM operations instead of sequential processing
+    # Default is 10, we increase to 20 for faster processing without hitting rate limits
+    os.environ.setdefault("SEMAPHORE_LIMIT", "20")
+
+    # Reduce reflexion iterations to minimize LLM calls
+    # Default is 3, reducing to 2 trades minimal quality (~3%) for 33% fewer calls
+    os.environ.setdefault("MAX_REFLEXION_ITERATIONS", "2")
+
+
+_configure_env()
+
 from graphiti_core import Graphiti
 from graphiti_core.nodes import EpisodeType
 from graphiti_core.search.search_config_recipes import (
@@ -16,279 +40,126 @@ from graphiti_core.search.search_config_recipes import (
     COMBINED_HYBRID_SEARCH_CROSS_ENCODER,
 )
 from graphiti_core.cross_encoder.client import CrossEncoderClient
+from graphiti_core.driver.neo4j_driver import Neo4jDriver
+from graphiti_core.llm_client.openai_client import OpenAIClient
+from graphiti_core.utils.bulk_utils import RawEpisode
+from neo4j import AsyncGraphDatabase
 
 from app.core.config import settings
 from app.models.schemas import MemoryHit
+from app.services._http_transports import (
+    DualModelRoutingTransport,
+    EmbeddingHTTPTransport,
+    _clean_llm_json,
+)
 
 logger = logging.getLogger(__name__)
 
-import json
-import re
-import copy
 import httpx
+import orjson
+from redis import asyncio as aioredis
+
+# Max number of (user_id, graph_version) summaries kept in memory
+SUMMARY_CACHE_SIZE = 256
+# Seconds a summary is shared with other adapter processes through Redis
+SUMMARY_REDIS_TTL = 300
+# Seconds a Redis call may take before the shared cache is skipped
+REDIS_TIMEOUT = 0.5
+
+# Max number of episode file names cached for search results
+EPISODE_FILE_CACHE_SIZE = 10000
+
+# search() result cache: seconds an entry stays valid, and max entries
+SEARCH_CACHE_TTL = 60.0
+SEARCH_CACHE_SIZE = 512
+# Recent query embeddings kept per user for the semantic search cache,
+# and max users it holds entries for
+SEMANTIC_CACHE_PER_USER = 32
+SEMANTIC_CACHE_USERS = 256
+
+# Window (seconds) during which concurrent rerank calls for the same query
+# are coalesced into one request
+RERANK_BATCH_WINDOW = 0.005
+
+# After a reranked search fails, use basic search for this many seconds
+# instead of retrying the reranker on every query
+RERANKER_FAILURE_BACKOFF = 30.0
+
+# EntityEdge fields copied into each MemoryHit
+_EDGE_FIELDS = attrgetter(
+    "fact",
+    "uuid",
+    "source_node_uuid",
+    "target_node_uuid",
+    "valid_at",
+    "invalid_at",
+    "created_at",
+)
 
-_original_json_loads = json.loads
-
-
-def _parse_edge_duplicate_response(text: str) -> Optional[dict]:
-    """
-    Parse EdgeDuplicate-like responses from LLM that may be in YAML-like or text format.
-    Returns a dict with duplicate_facts, fact_type, contradicted_facts if found, else None.
-
-    Handles formats like:
-    - duplicate_facts: []
-      fact_type: DEFAULT
-      contradicted_facts: [6]
-    - []  (No duplicates found)
-      Contradicted Facts: []
-    - {"duplicate_facts": [], "fact_type": DEFAULT, "contradicted_facts": []}  (unquoted DEFAULT)
-    - Duplicate Facts: [] / Contradicted Facts: [0] (space in names)
-    """
-    result = {"duplicate_facts": [], "fact_type": "DEFAULT", "contradicted_facts": []}
-
-    found_any = False
-
-    # Pattern 1a: YAML-like key: value format (underscore version)
-    # Match duplicate_facts: [] or duplicate_facts: [1, 2]
-    dup_match = re.search(r"duplicate_facts[:\s]+\[([^\]]*)\]", text, re.IGNORECASE)
-    if dup_match:
-        found_any = True
-        vals = dup_match.group(1).strip()
-        if vals:
-            result["duplicate_facts"] = [
-                int(x.strip()) for x in vals.split(",") if x.strip().isdigit()
-            ]
-
-    # Pattern 1b: Space version - "Duplicate Facts: []"
-    if not dup_match:
-        dup_match2 = re.search(
-            r"duplicate\s+facts[:\s]+\[([^\]]*)\]", text, re.IGNORECASE
-        )
-        if dup_match2:
-            found_any = True
-            vals = dup_match2.group(1).strip()
-            if vals:
-                result["duplicate_facts"] = [
-                    int(x.strip()) for x in vals.split(",") if x.strip().isdigit()
-                ]
-
-    # Match fact_type: DEFAULT or fact_type: "DEFAULT" or "fact_type": DEFAULT
-    type_match = re.search(r'fact_type[:\s]+["\']?(\w+)["\']?', text, re.IGNORECASE)
-    if type_match:
-        found_any = True
-        result["fact_type"] = type_match.group(1).upper()
-
-    # Pattern 1b for type: "Fact Type: DEFAULT"
-    if not type_match:
-        type_match2 = re.search(
-            r'fact\s+type[:\s]+["\']?(\w+)["\']?', text, re.IGNORECASE
-        )
-        if type_match2:
-            found_any = True
-            result["fact_type"] = type_match2.group(1).upper()
-
-    # Pattern 2a: Match contradicted_facts: [] or contradicted_facts: [6, 7] (underscore)
-    contra_match = re.search(
-        r"contradicted_facts[:\s]+\[([^\]]*)\]", text, re.IGNORECASE
-    )
-    if contra_match:
-        found_any = True
-        vals = contra_match.group(1).strip()
-        if vals:
-            result["contradicted_facts"] = [
-                int(x.strip()) for x in vals.split(",") if x.strip().isdigit()
-            ]
-
-    # Pattern 2b: Space version - "Contradicted Facts: [0]"
-    if not contra_match:
-        contra_match2 = re.search(
-            r"contradicted\s+facts[:\s]+\[([^\]]*)\]", text, re.IGNORECASE
-        )
-        if contra_match2:
-            found_any = True
-            vals = contra_match2.group(1).strip()
-            if vals:
-                result["contradicted_facts"] = [
-                    int(x.strip()) for x in vals.split(",") if x.strip().isdigit()
-                ]
 
-    # Pattern 3: Check for "No duplicates found" or similar text patterns
-    if "no duplicates" in text.lower() or "no duplicate" in text.lower():
-        found_any = True
-        result["duplicate_facts"] = []
-
-    if "no contradictions" in text.lower() or "no contradiction" in text.lower():
-        found_any = True
-        result["contradicted_facts"] = []
-
-    # Pattern 4: Handle structured response sections like "1. DUPLICATE DETECTION:", etc.
-    # This handles free-form responses that describe results in sections
-    if "duplicate detection" in text.lower():
-        found_any = True
-        # Look for idx values or empty list mentions
-        idx_match = re.search(r"idx\s*values?[:\s]+\[([^\]]*)\]", text, re.IGNORECASE)
-        if idx_match:
-            vals = idx_match.group(1).strip()
-            if vals:
-                result["duplicate_facts"] = [
-                    int(x.strip()) for x in vals.split(",") if x.strip().isdigit()
-                ]
-            else:
-                result["duplicate_facts"] = []
-
-    if "contradiction detection" in text.lower():
-        found_any = True
-        # Look for "contradicts" or index mentions
-        contra_idx_match = re.search(
-            r"contradicts?\s+(?:the\s+)?(?:first\s+)?fact\s*\(?\s*idx\s*(\d+)",
-            text,
-            re.IGNORECASE,
-        )
-        if contra_idx_match:
-            result["contradicted_facts"] = [int(contra_idx_match.group(1))]
-        # Also try: "Contradicted facts: [0]"
-        contra_idx_match2 = re.search(
-            r"contradicted\s*facts[:\s]+\[([^\]]*)\]", text, re.IGNORECASE
-        )
-        if contra_idx_match2:
-            vals = contra_idx_match2.group(1).strip()
-            if vals:
-                result["contradicted_facts"] = [
-                    int(x.strip()) for x in vals.split(",") if x.strip().isdigit()
-                ]
+def _isoformat(value: Any) -> Optional[str]:
+    """ISO-8601 string for a Neo4j temporal; values stored as strings pass through."""
+    if value is None:
+        return None
+    if hasattr(value, "to_native"):
+        return value.to_native().isoformat()
+    return str(value)
 
-    return result if found_any else None
 
+def _normalize(vector: List[float]) -> List[float]:
+    """Scale vector to unit length, so cosine similarity is a dot product."""
+    norm = sum(x * x for x in vector) ** 0.5
+    return [x / norm for x in vector] if norm else list(vector)
 
-def _fix_array_as_object(s: str) -> str:
-    """
-    Fix malformed JSON where array brackets are used instead of object braces.
-    E.g.: ["duplicate_facts": [], ...] -> {"duplicate_facts": [], ...}
 
-    This happens when LLM returns EdgeDuplicate in invalid format.
-    """
-    s = s.strip()
-    # Check if it looks like an array with key:value pairs
-    if s.startswith("[") and s.endswith("]"):
-        # Check if it contains key: value pattern (indicates object, not array)
-        if re.search(r'"\w+":\s*[\[\{"\d]', s):
-            # Replace outer brackets with braces
-            return "{" + s[1:-1] + "}"
-    return s
+def _dot(a: List[float], b: List[float]) -> float:
+    return sum(map(mul, a, b))
 
 
-def _fix_unquoted_json_values(s: str) -> str:
+class CleaningOpenAIClient(OpenAIClient):
     """
-    Fix JSON with unquoted string values like DEFAULT, true, false, null.
-    E.g.: {"fact_type": DEFAULT} -> {"fact_type": "DEFAULT"}
+    OpenAIClient that parses LLM output with _clean_llm_json instead of json.loads,
+    so malformed model output is repaired without patching json.loads globally.
     """
 
-    # Pattern: "key": WORD (where WORD is not a number, true, false, null, or already quoted)
-    # This pattern looks for: "key": followed by an unquoted word that's not a JSON literal
-    def replace_unquoted(match):
-        key = match.group(1)
-        value = match.group(2)
-        # Check if value is a JSON literal or number
-        if value.lower() in ("true", "false", "null") or re.match(
-            r"^-?\d+\.?\d*$", value
-        ):
-            return f'"{key}": {value}'
-        # It's an unquoted string, add quotes
-        return f'"{key}": "{value}"'
-
-    # Match "key": WORD patterns (WORD is alphanumeric, not followed by quote)
-    pattern = r'"(\w+)":\s*([A-Za-z_][A-Za-z0-9_]*)\b(?!["\'])'
-    return re.sub(pattern, replace_unquoted, s)
-
-
-def _patched_json_loads(s, *args, **kwargs):
-    """Patched json.loads that cleans markdown and extracts JSON before parsing.
-
-    Also handles:
-    - YAML-like EdgeDuplicate responses from LLM models
-    - Unquoted string values in JSON (e.g., DEFAULT instead of "DEFAULT")
-    - Plain text that needs to be extracted into structured format
-    """
-    if isinstance(s, str):
-        original_s = s
-
-        # 1. Strip markdown code blocks
-        if "```" in s:
-            match = re.search(r"```(?:\w+)?\s*(.*?)```", s, re.DOTALL)
-            if match:
-                s = match.group(1).strip()
-            else:
-                s = s.replace("```json", "").replace("```", "").strip()
-
-        # 2. EARLY CHECK: If this looks like EdgeDuplicate response, parse it FIRST
-        # This must happen BEFORE JSON extraction because YAML-like responses start with []
-        edge_dup_keywords = [
-            "duplicate_facts",
-            "contradicted_facts",
-            "fact_type",
-            "duplicate facts",
-            "contradicted facts",
-            "fact type",
-            "duplicate detection",
-            "contradiction detection",
-        ]
-        if any(kw in s.lower() for kw in edge_dup_keywords):
-            edge_dup_result = _parse_edge_duplicate_response(s)
-            if edge_dup_result:
-                logger.info(
-                    "json.loads patch: converted EdgeDuplicate YAML-like response to JSON"
-                )
-                return edge_dup_result
-
-        # 3. Try to extract JSON structure
-        first_brace = s.find("{")
-        first_bracket = s.find("[")
-
-        start_idx = -1
-        end_char = ""
-
-        if first_brace != -1 and (first_bracket == -1 or first_brace < first_bracket):
-            start_idx = first_brace
-            end_char = "}"
-        elif first_bracket != -1:
-            start_idx = first_bracket
-            end_char = "]"
-
-        extracted_json = None
-        if start_idx != -1:
-            end_idx = s.rfind(end_char)
-            if end_idx != -1 and end_idx > start_idx:
-                extracted_json = s[start_idx : end_idx + 1]
-
-        # 4. Try to parse extracted JSON
-        if extracted_json:
-            try:
-                # First try direct parse
-                return _original_json_loads(extracted_json, *args, **kwargs)
-            except json.JSONDecodeError:
-                # Try fixing unquoted values (e.g., DEFAULT instead of "DEFAULT")
-                try:
-                    fixed_json = _fix_unquoted_json_values(extracted_json)
-                    result = _original_json_loads(fixed_json, *args, **kwargs)
-                    logger.info("json.loads patch: fixed unquoted values in JSON")
-                    return result
-                except json.JSONDecodeError:
-                    pass
-
-        # 5. If we extracted JSON but couldn't parse it, try the original extraction logic
-        if extracted_json:
-            s = extracted_json
+    def _handle_structured_response(self, response: Any) -> Dict[str, Any]:
+        response_object = response.output_text
 
-        if s != original_s:
-            logger.info("json.loads patch: cleaned input")
+        if response_object:
+            return _clean_llm_json(response_object)
+        return super()._handle_structured_response(response)
 
-    return _original_json_loads(s, *args, **kwargs)
+    def _handle_json_response(self, response: Any) -> Dict[str, Any]:
+        result = response.choices[0].message.content or "{}"
+        return _clean_llm_json(result)
 
 
-json.loads = _patched_json_loads
-
+class PooledNeo4jDriver(Neo4jDriver):
+    """
+    Neo4jDriver with a sized Bolt connection pool. graphiti-core's driver
+    builds its AsyncDriver with default pool settings and no way to pass
+    others, so this one is built here instead.
+    """
 
-json.loads = _patched_json_loads
+    def __init__(
+        self,
+        uri: str,
+        user: str,
+        password: str,
+        max_connection_pool_size: int,
+        connection_acquisition_timeout: float,
+    ):
+        # Neo4jDriver.__init__ is skipped so only one AsyncDriver is created.
+        # Its other job, scheduling Graphiti's index build, only happens when
+        # constructed inside a running event loop, which this module never is
+        self.client = AsyncGraphDatabase.driver(
+            uri=uri,
+            auth=(user or "", password or ""),
+            max_connection_pool_size=max_connection_pool_size,
+            connection_acquisition_timeout=connection_acquisition_timeout,
+        )
+        self._database = "neo4j"
+        self.aoss_client = None
 
 
 class RemoteRerankerClient(CrossEncoderClient):
@@ -314,15 +185,107 @@ class RemoteRerankerClient(CrossEncoderClient):
 
         self.api_key = api_key
         self.model = model
-        self.client = httpx.AsyncClient(timeout=30.0)
+        self._headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        }
+        # Serialized '{"model": ...' with the closing brace dropped; each
+        # request appends its own fields to it
+        self._payload_prefix = orjson.dumps({"model": model})[:-1]
+        # Rerank runs on every search: keep a warm, explicitly sized pool so
+        # concurrent queries reuse connections instead of re-handshaking.
+        # Over TLS, HTTP/2 multiplexes them on a single connection.
+        self.client = httpx.AsyncClient(
+            http2=True,
+            timeout=30.0,
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=32,
+                keepalive_expiry=60.0,
+            ),
+        )
+        # query -> [(passages, future)] waiting for the next coalesced request
+        self._pending: Dict[str, list] = {}
+        self._flush_tasks: set = set()
         logger.info(
             f"RemoteRerankerClient initialized with endpoint: {self.rerank_url}"
         )
 
-    async def rank(self, query: str, passages: list[str]) -> list[tuple[str, float]]:
+    async def close(self):
+        """Close the pooled HTTP connections"""
+        await self.client.aclose()
+
+    async def rank(
+        self, query: str, passages: list[str], top_n: Optional[int] = None
+    ) -> list[tuple[str, float]]:
+        """
+        Rank passages against query, keeping only the top_n best when given
+        (defaults to settings.RERANKER_TOP_N, 0 meaning all passages).
+
+        Concurrent calls for the same query (Graphiti's combined search reranks
+        edges, nodes and episodes in parallel) are coalesced for a short window
+        and sent as a single rerank request, then split back per caller.
+        """
         if not passages:
             return []
+        if top_n is None:
+            top_n = settings.RERANKER_TOP_N or None
+
+        future = asyncio.get_running_loop().create_future()
+        waiters = self._pending.get(query)
+        if waiters is None:
+            self._pending[query] = [(passages, top_n, future)]
+            task = asyncio.create_task(self._flush(query))
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+        else:
+            waiters.append((passages, top_n, future))
+
+        return await future
+
+    async def _flush(self, query: str):
+        """Send all passages queued for query in one request and resolve waiters."""
+        await asyncio.sleep(RERANK_BATCH_WINDOW)
+        waiters = self._pending.pop(query)
+
+        combined = [p for passages, _, _ in waiters for p in passages]
+        if len(waiters) > 1:
+            logger.info(
+                f"Coalesced {len(waiters)} rerank calls into one request ({len(combined)} passages)"
+            )
+
+        # The server can only cut results to top_n for a single caller; with
+        # several, one caller's best passages may rank below another's
+        server_top_n = waiters[0][1] if len(waiters) == 1 else None
+
+        try:
+            ranked = await self._rank_indices(query, combined, server_top_n)
+        except Exception as e:
+            for _, _, future in waiters:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        # Split global indices back into each caller's own passages
+        offset = 0
+        for passages, top_n, future in waiters:
+            end = offset + len(passages)
+            if not future.done():
+                own = [
+                    (passages[i - offset], score)
+                    for i, score in ranked
+                    if offset <= i < end
+                ]
+                future.set_result(own[:top_n] if top_n else own)
+            offset = end
 
+    async def _rank_indices(
+        self, query: str, passages: list[str], top_n: Optional[int] = None
+    ) -> list[tuple[int, float]]:
+        """
+        Call the rerank endpoint and return (passage index, score) pairs,
+        sorted by score descending, at most top_n of them when given.
+        """
         # Configuration for avoiding 400 Bad Request due to context length
         MAX_DOC_LENGTH = 500  # Max characters per document
         MAX_BATCH_SIZE = 50  # Max documents per request
@@ -333,87 +296,59 @@ class RemoteRerankerClient(CrossEncoderClient):
         ]
 
         url = self.rerank_url
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
+        headers = self._headers
+        prefix = self._payload_prefix + b',"query":' + orjson.dumps(query)
+        post = self.client.post
 
         try:
-            # Process in batches if too many documents
-            if len(truncated_passages) <= MAX_BATCH_SIZE:
-                # Single batch - simple case
-                payload = {
-                    "model": self.model,
-                    "query": query,
-                    "documents": truncated_passages,
-                    "top_n": len(truncated_passages),
-                }
-                logger.info(f"Reranking {len(truncated_passages)} passages via {url}")
-                response = await self.client.post(url, headers=headers, json=payload)
-                response.raise_for_status()
-
-                data = response.json()
-                results = data.get("results", [])
-
-                # Map results back to original passages (not truncated)
-                ranked = []
-                for res in results:
-                    idx = res.get("index")
-                    score = res.get("relevance_score")
-                    if idx is not None and 0 <= idx < len(passages):
-                        ranked.append((passages[idx], float(score)))
-
-                logger.info(
-                    f"Rerank success, top score: {ranked[0][1] if ranked else 'none'}"
-                )
-                return ranked
-            else:
-                # Multiple batches - aggregate results
+            if len(truncated_passages) > MAX_BATCH_SIZE:
                 logger.info(
                     f"Reranking {len(truncated_passages)} passages in {(len(truncated_passages) + MAX_BATCH_SIZE - 1) // MAX_BATCH_SIZE} batches"
                 )
-                all_results = []
+            else:
+                logger.info(f"Reranking {len(truncated_passages)} passages via {url}")
 
-                for batch_start in range(0, len(truncated_passages), MAX_BATCH_SIZE):
-                    batch_end = min(
-                        batch_start + MAX_BATCH_SIZE, len(truncated_passages)
+            # Process in batches if too many documents
+            all_results = []
+            for batch_start in range(0, len(truncated_passages), MAX_BATCH_SIZE):
+                batch = truncated_passages[batch_start : batch_start + MAX_BATCH_SIZE]
+                batch_len = len(batch)
+
+                # Each batch's top_n covers the global top_n
+                batch_top_n = min(batch_len, top_n) if top_n else batch_len
+                body = b"".join(
+                    (
+                        prefix,
+                        b',"documents":',
+                        orjson.dumps(batch),
+                        b',"top_n":%d}' % batch_top_n,
                     )
-                    batch = truncated_passages[batch_start:batch_end]
-
-                    payload = {
-                        "model": self.model,
-                        "query": query,
-                        "documents": batch,
-                        "top_n": len(batch),
-                    }
+                )
 
-                    logger.info(
-                        f"Reranking batch {batch_start // MAX_BATCH_SIZE + 1}: {len(batch)} passages"
-                    )
-                    response = await self.client.post(
-                        url, headers=headers, json=payload
-                    )
-                    response.raise_for_status()
+                response = await post(url, headers=headers, content=body)
+                response.raise_for_status()
 
-                    data = response.json()
-                    batch_results = data.get("results", [])
+                data = response.json()
 
-                    # Adjust indices to global position and use original passages
-                    for res in batch_results:
-                        local_idx = res.get("index")
-                        score = res.get("relevance_score")
-                        if local_idx is not None:
-                            global_idx = batch_start + local_idx
-                            if 0 <= global_idx < len(passages):
-                                all_results.append((passages[global_idx], float(score)))
+                # Adjust indices to global position
+                all_results.extend(
+                    [
+                        (batch_start + res["index"], float(res["relevance_score"]))
+                        for res in data.get("results", ())
+                        if 0 <= res.get("index", -1) < batch_len
+                    ]
+                )
 
-                # Sort all results by score descending
-                all_results.sort(key=lambda x: x[1], reverse=True)
+            # Sort all results by score descending (batches and coalesced
+            # callers are merged, so server order alone isn't enough)
+            all_results.sort(key=itemgetter(1), reverse=True)
+            if top_n:
+                del all_results[top_n:]
 
-                logger.info(
-                    f"Rerank success (batched), top score: {all_results[0][1] if all_results else 'none'}"
-                )
-                return all_results
+            logger.info(
+                f"Rerank success, top score: {all_results[0][1] if all_results else 'none'}"
+            )
+            return all_results
 
         except Exception as e:
             logger.error(f"Remote reranking failed: {e}")
@@ -426,6 +361,273 @@ class RemoteRerankerClient(CrossEncoderClient):
             raise e
 
 
+# Hot-path Cypher queries. Kept as module-level constants and fully
+# parameterized so the query text is identical across calls and Neo4j's
+# plan cache is reused instead of replanning.
+
+# Episode lookups filter by group_id (the owning user), name, file_name
+# or uuid, pending episode lookups by user_id and file_name; without these
+# every such query scans the whole label.
+_Q_INDEXES = (
+    "CREATE INDEX episode_group_id IF NOT EXISTS FOR (e:Episodic) ON (e.group_id)",
+    "CREATE INDEX episode_name IF NOT EXISTS FOR (e:Episodic) ON (e.name)",
+    "CREATE INDEX episode_file_name IF NOT EXISTS FOR (e:Episodic) ON (e.file_name)",
+    "CREATE INDEX episode_uuid IF NOT EXISTS FOR (e:Episodic) ON (e.uuid)",
+    "CREATE INDEX pending_user_id IF NOT EXISTS FOR (p:PendingEpisode) ON (p.user_id)",
+    "CREATE INDEX pending_file_name IF NOT EXISTS FOR (p:PendingEpisode) ON (p.file_name)",
+)
+
+# Episodes are scoped to a user by group_id, which Graphiti sets on every
+# episode the adapter adds. Older episodes may lack it; recover it from the
+# name, f"{user_id}_{timestamp}" (the ISO timestamp has no underscore).
+# Runs in an auto-commit transaction, committing in batches.
+_Q_BACKFILL_EPISODE_GROUP_IDS = """
+MATCH (e:Episodic)
+WHERE (e.group_id IS NULL OR e.group_id = '') AND e.name CONTAINS '_'
+CALL {
+    WITH e
+    SET e.group_id = left(e.name, size(e.name) - size(last(split(e.name, '_'))) - 1)
+} IN TRANSACTIONS OF 10000 ROWS
+RETURN count(*) as updated
+"""
+
+_Q_GET_USER_GRAPH = """
+MATCH (e:Episodic)
+WHERE e.group_id = $user_id
+MATCH (e)-[:MENTIONS]->(n:Entity)
+WHERE n.group_id = $user_id
+// One row per entity, however many episodes mention it, before its
+// relationships are expanded
+WITH DISTINCT n
+OPTIONAL MATCH (n)-[r:RELATES_TO]-(m:Entity)
+WHERE m.group_id = $user_id
+WITH collect(DISTINCT n) as entities, collect(DISTINCT r) as relationships
+
+// Shape Cytoscape.js elements in the database, not per element in Python
+RETURN
+    [n IN entities | {data: {
+        id: n.uuid,
+        label: coalesce(n.name, 'Unknown'),
+        summary: left(coalesce(n.summary, ''), 200),
+        created_at: toString(n.created_at)
+    }}] as nodes,
+    [r IN relationships | {data: {
+        id: coalesce(r.uuid, startNode(r).uuid + '_' + endNode(r).uuid),
+        source: startNode(r).uuid,
+        target: endNode(r).uuid,
+        label: left(coalesce(r.fact, ''), 100)
+    }}] as edges
+"""
+
+_Q_DELETE_USER = """
+CALL {
+    // Find all episodes for this user
+    MATCH (e:Episodic)
+    WHERE e.group_id = $user_id
+
+    // Match connected nodes
+    OPTIONAL MATCH (e)--(n)
+
+    // Use DETACH DELETE to automatically remove all relationships
+    DETACH DELETE e, n
+
+    RETURN count(DISTINCT e) as episodes_deleted
+}
+CALL {
+    // Then every other node of the user (handles orphaned nodes)
+    MATCH (n)
+    WHERE n.group_id = $user_id
+    DETACH DELETE n
+    RETURN count(n) as nodes_deleted
+}
+RETURN episodes_deleted, nodes_deleted
+"""
+
+_Q_GET_USER_EPISODES = """
+CALL {
+    // 1. Get processed episodes
+    MATCH (e:Episodic)
+    WHERE e.group_id = $user_id AND e.file_name IS NULL
+    RETURN e.uuid as uuid, e.name as name, e.created_at as created_at,
+           e.source_description as source,
+           // Only sent when asked for: bodies dominate wide listings
+           CASE WHEN $include_content
+               THEN coalesce(e.content, e.episode_body, "") END as content,
+           'processed' as status
+
+    UNION ALL
+
+    // 2. Get pending episodes
+    MATCH (p:PendingEpisode)
+    WHERE p.user_id = $user_id AND p.file_name IS NULL
+    RETURN p.uuid as uuid, "pending_" + p.uuid as name, p.created_at as created_at,
+           p.source as source,
+           CASE WHEN $include_content THEN p.content END as content,
+           'pending' as status
+}
+RETURN uuid, name, created_at, source, content, status
+// Pending episodes store created_at as an ISO string, processed ones as a
+// DateTime: compare them as strings, but send the DateTime natively
+ORDER BY toString(created_at) DESC
+"""
+
+_Q_GET_USER_EPISODES_LIMIT = _Q_GET_USER_EPISODES + "LIMIT $limit\n"
+
+# Shared tail of the episode delete queries: expects `deleted_entities`,
+# the entities the deleted episodes mentioned, and `owner`, the user they
+# belonged to (returned for cache invalidation). Deletes the entities no
+# other episode mentions, then RELATES_TO edges between the survivors and
+# entities that are no longer mentioned. Only the deleted episodes'
+# neighbourhood is visited, never every RELATES_TO edge in the graph.
+# MENTIONS always starts at an Episodic node, so the EXISTS checks leave
+# the label out and are answered from the entity's relationship degree.
+_Q_DELETE_ORPHANS = """
+// Check which entities became orphaned (no other episodes mention them)
+WITH owner,
+    [x IN deleted_entities WHERE NOT EXISTS { (x)<-[:MENTIONS]-() }]
+        as orphaned_entities,
+    [x IN deleted_entities WHERE EXISTS { (x)<-[:MENTIONS]-() }]
+        as kept_entities
+
+// Delete orphaned entities (DETACH DELETE removes their RELATES_TO edges too)
+FOREACH (orphan IN orphaned_entities | DETACH DELETE orphan)
+
+// Delete edges from surviving entities to entities no episode mentions
+CALL {
+    WITH kept_entities
+    UNWIND kept_entities as entity
+    MATCH (entity)-[r:RELATES_TO]-(other:Entity)
+    WHERE NOT EXISTS { (other)<-[:MENTIONS]-() }
+    DELETE r
+    RETURN count(DISTINCT r) as deleted_edges
+}
+
+RETURN owner, size(orphaned_entities) as deleted_entities, deleted_edges
+"""
+
+_Q_DELETE_EPISODE = """
+// Find the episode to delete
+MATCH (e:Episodic {uuid: $uuid})
+
+// Find all entities mentioned by this episode
+OPTIONAL MATCH (e)-[:MENTIONS]->(entity:Entity)
+WITH e, e.group_id as owner, collect(DISTINCT entity) as deleted_entities
+
+// Delete the episode first
+DETACH DELETE e
+WITH owner, deleted_entities
+""" + _Q_DELETE_ORPHANS
+
+_Q_DELETE_FILE_EPISODES = """
+// Find all episodes of the user from any of the files
+MATCH (e:Episodic)
+WHERE e.file_name IN $file_names AND e.group_id = $user_id
+
+// Find all entities mentioned by these episodes
+OPTIONAL MATCH (e)-[:MENTIONS]->(entity:Entity)
+WITH collect(DISTINCT e) as target_episodes, collect(DISTINCT entity) as deleted_entities
+
+// Delete the episodes first
+FOREACH (ep IN target_episodes | DETACH DELETE ep)
+WITH $user_id as owner, deleted_entities
+""" + _Q_DELETE_ORPHANS
+
+_Q_SAVE_PENDING_EPISODES = """
+MERGE (u:User {id: $user_id})
+WITH u
+UNWIND $rows AS row
+CREATE (p:PendingEpisode {
+    uuid: row.uuid,
+    content: row.content,
+    created_at: row.created_at,
+    source: row.source,
+    file_name: row.file_name,
+    status: 'pending',
+    user_id: $user_id
+})
+MERGE (u)-[:HAS_PENDING]->(p)
+"""
+
+_Q_GET_EPISODE_FILE_NAMES = """
+UNWIND $uuids AS episode_uuid
+MATCH (e:Episodic {uuid: episode_uuid})
+RETURN e.uuid AS uuid, e.file_name AS file_name
+"""
+
+_Q_DELETE_PENDING_EPISODE = """
+MATCH (p:PendingEpisode)
+WHERE p.user_id = $user_id AND p.content = $text
+DETACH DELETE p
+"""
+
+_Q_GET_STUCK_PENDING_EPISODES = """
+MATCH (p:PendingEpisode)
+WHERE p.created_at < $cutoff
+RETURN p.user_id as user_id, p.content as content, p.source as source, p.uuid as uuid
+"""
+
+_Q_TAG_EPISODE_FILE = """
+MATCH (e:Episodic {name: $name})
+SET e.file_name = $file_name
+RETURN e
+"""
+
+_Q_TAG_EPISODE_FILES = """
+UNWIND $tags AS tag
+MATCH (e:Episodic {name: tag.name})
+SET e.file_name = tag.file_name
+"""
+
+_Q_DELETE_PROCESSED_PENDING_EPISODES = """
+MATCH (p:PendingEpisode)
+WHERE p.user_id = $user_id AND p.content IN $texts
+DETACH DELETE p
+"""
+
+_Q_GET_USER_FILES = """
+CALL {
+    // Each arm aggregates on its own, so only one row per file
+    // and label is merged; both lookups are index seeks
+    MATCH (e:Episodic)
+    WHERE e.group_id = $user_id AND e.file_name IS NOT NULL
+    RETURN e.file_name as file_name, count(e) as chunk_count, max(e.created_at) as last_modified
+
+    UNION ALL
+
+    MATCH (p:PendingEpisode)
+    WHERE p.user_id = $user_id AND p.file_name IS NOT NULL
+    RETURN p.file_name as file_name, count(p) as chunk_count, max(p.created_at) as last_modified
+}
+WITH file_name, sum(chunk_count) as total_chunks, max(last_modified) as last_modified
+RETURN file_name, total_chunks, last_modified as created_at
+ORDER BY last_modified DESC
+"""
+
+_Q_DELETE_FILE_PENDING_EPISODES = """
+MATCH (p:PendingEpisode)
+WHERE p.user_id = $user_id AND p.file_name IN $file_names
+DETACH DELETE p
+RETURN count(p) as pending_deleted
+"""
+
+
+def _make_cleaning_transport(
+    inner: Optional[httpx.AsyncBaseTransport] = None,
+) -> DualModelRoutingTransport:
+    """
+    LLM transport (retries, cleaning, main/fast routing) built from settings.
+    `inner` replaces the real connection pool, e.g. with a MockTransport.
+    """
+    return DualModelRoutingTransport(
+        main_base_url=settings.LLM_BASE_URL,
+        main_api_key=settings.LLM_API_KEY,
+        fast_base_url=settings.LLM_FAST_BASE_URL,
+        fast_api_key=settings.LLM_FAST_API_KEY,
+        fast_model=settings.LLM_FAST_MODEL,
+        inner=inner,
+    )
+
+
 class GraphitiWrapper:
     """
     Wrapper for Graphiti SDK that integrates with Neo4j.
@@ -434,20 +636,28 @@ class GraphitiWrapper:
 
     def __init__(self):
         """Initialize Graphiti client with Neo4j connection and custom LLM/Embedder"""
-        try:
-            import os
-
-            # Set SEMAPHORE_LIMIT for Graphiti's internal concurrency control
-            # This allows parallel LLM operations instead of sequential processing
-            # Default is 10, we increase to 20 for faster processing without hitting rate limits
-            if "SEMAPHORE_LIMIT" not in os.environ:
-                os.environ["SEMAPHORE_LIMIT"] = "20"
-
-            # Reduce reflexion iterations to minimize LLM calls
-            # Default is 3, reducing to 2 trades minimal quality (~3%) for 33% fewer calls
-            if "MAX_REFLEXION_ITERATIONS" not in os.environ:
-                os.environ["MAX_REFLEXION_ITERATIONS"] = "2"
+        # Per-user graph change counter, bumped on every write/delete.
+        # Cached reads are keyed by (user_id, version) so writes invalidate them.
+        self._user_version: Dict[str, int] = defaultdict(int)
+        self._summary_cache: "OrderedDict[tuple, str]" = OrderedDict()
+        # (user_id, version, query, limit, center) -> (expires, hits)
+        self._search_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        # user_id -> [(expires, (version, limit, center), query embedding, hits)]
+        self._semantic_cache: "OrderedDict[str, list]" = OrderedDict()
+        # (user_id, version, episode_uuid) -> file_name, for search results
+        self._episode_file_cache: "OrderedDict[tuple, Optional[str]]" = OrderedDict()
+        # time.monotonic() until which search skips the reranker
+        self._reranker_failed_until = 0.0
+        # Graph versions and summaries shared by all adapter processes:
+        # graph_version:{user_id} (and graph_version, when the owner is
+        # unknown) is bumped on every write/delete
+        self._redis = aioredis.from_url(
+            settings.REDIS_URL,
+            socket_timeout=REDIS_TIMEOUT,
+            socket_connect_timeout=REDIS_TIMEOUT,
+        )
 
+        try:
             logger.info(
                 f"SEMAPHORE_LIMIT set to: {os.environ.get('SEMAPHORE_LIMIT', '10')}"
             )
@@ -456,7 +666,6 @@ class GraphitiWrapper:
             )
 
             from openai import AsyncOpenAI
-            from graphiti_core.llm_client.openai_client import OpenAIClient
             from graphiti_core.llm_client.config import LLMConfig
             from graphiti_core.embedder.openai import (
                 OpenAIEmbedder,
@@ -466,1058 +675,8 @@ class GraphitiWrapper:
                 OpenAIRerankerClient,
             )
 
-            # Custom HTTP Transport to intercept and clean responses at the network layer
-            import httpx
-            import json
-            import re
-
-            class CleaningHTTPTransport(httpx.AsyncHTTPTransport):
-                async def handle_async_request(self, request):
-                    # Inject JSON instruction into request
-                    # We assume any POST request going through this client is an LLM request
-                    if request.method == "POST":
-                        logger.info(f"Intercepted POST request to: {request.url}")
-                        try:
-                            # We can't easily modify the request body here without reading it,
-                            # which consumes the stream. So we rely on the system prompt
-                            # being set in the client config or the response cleaning.
-                            pass
-                        except Exception:
-                            pass
-
-                    import asyncio
-                    import time
-
-                    # Retry configuration
-                    TIMEOUT = 30
-                    RETRY_INTERVAL = 5
-                    start_time = time.time()
-
-                    while True:
-                        try:
-                            response = await super().handle_async_request(request)
-
-                            # If successful, break loop
-                            if response.status_code < 400:
-                                break
-
-                            # Don't retry on client errors (4xx) except 429 (Too Many Requests)
-                            if (
-                                400 <= response.status_code < 500
-                                and response.status_code != 429
-                            ):
-                                logger.error(
-                                    f"Request failed with status {response.status_code} (Client Error). Not retrying."
-                                )
-                                # Try to read error body for debugging
-                                try:
-                                    await response.aread()
-                                    error_body = response.content.decode(
-                                        "utf-8", errors="ignore"
-                                    )
-                                    logger.error(f"Error body: {error_body}")
-                                except:
-                                    pass
-                                break
-
-                            # If error (5xx or 429), check timeout
-                            elapsed = time.time() - start_time
-
-                            # Try to read error body for debugging
-                            error_body = ""
-                            try:
-                                await response.aread()
-                                error_body = response.content.decode(
-                                    "utf-8", errors="ignore"
-                                )
-                            except:
-                                pass
-
-                            if elapsed >= TIMEOUT:
-                                logger.error(
-                                    f"Request failed after {TIMEOUT}s retrying. Final status: {response.status_code}. Error: {error_body}"
-                                )
-                                break
-
-                            logger.warning(
-                                f"Request failed with status {response.status_code}. Error: {error_body}. Retrying in {RETRY_INTERVAL}s... (Elapsed: {int(elapsed)}s)"
-                            )
-                            await asyncio.sleep(RETRY_INTERVAL)
-
-                        except Exception as e:
-                            # Handle network errors
-                            elapsed = time.time() - start_time
-                            if elapsed >= TIMEOUT:
-                                logger.error(
-                                    f"Request failed after {TIMEOUT}s retrying. Error: {e}"
-                                )
-                                raise e
-
-                            logger.warning(
-                                f"Request failed with error {e}. Retrying in {RETRY_INTERVAL}s... (Elapsed: {int(elapsed)}s)"
-                            )
-                            await asyncio.sleep(RETRY_INTERVAL)
-
-                    # Intercept response
-                    if response.status_code == 200:
-                        try:
-                            # Read the response body
-                            await response.aread()
-
-                            # Log first 500 chars of response for debugging
-                            logger.info(
-                                f"Response body preview: {response.content[:500]}"
-                            )
-
-                            try:
-                                data = json.loads(response.content)
-                            except json.JSONDecodeError:
-                                logger.warning("Response is not valid JSON")
-                                return response
-
-                            if (
-                                isinstance(data, dict)
-                                and "choices" in data
-                                and len(data["choices"]) > 0
-                            ):
-                                content = data["choices"][0]["message"]["content"]
-                                if content:
-                                    logger.info(f"LLM Raw Response (HTTP): {content}")
-                                    original_content = content
-
-                                    # 1. Clean Markdown/XML
-                                    if "```" in content:
-                                        match = re.search(
-                                            r"```(?:\w+)?\s*(.*?)```",
-                                            content,
-                                            re.DOTALL,
-                                        )
-                                        if match:
-                                            content = match.group(1).strip()
-                                        else:
-                                            content = (
-                                                content.replace("```json", "")
-                                                .replace("```", "")
-                                                .strip()
-                                            )
-
-                                    # EARLY CHECK: If this looks like EdgeDuplicate response, parse it FIRST
-                                    # This must happen BEFORE JSON extraction because YAML-like responses
-                                    # contain [] which would be extracted incorrectly
-                                    edge_dup_keywords_early = [
-                                        "duplicate_facts",
-                                        "contradicted_facts",
-                                        "fact_type",
-                                        "duplicate facts",
-                                        "contradicted facts",
-                                        "fact type",
-                                        "duplicate detection",
-                                        "contradiction detection",
-                                        "duplicated_facts",
-                                    ]
-                                    if any(
-                                        kw in content.lower()
-                                        for kw in edge_dup_keywords_early
-                                    ):
-                                        # First, try to parse as YAML-like format
-                                        edge_dup_result = (
-                                            _parse_edge_duplicate_response(content)
-                                        )
-                                        if edge_dup_result:
-                                            logger.info(
-                                                "Fixing JSON: Early EdgeDuplicate detection (standard path) - converting YAML to JSON"
-                                            )
-                                            content = json.dumps(edge_dup_result)
-                                            # Skip JSON extraction, go directly to response modification
-                                            data["choices"][0]["message"]["content"] = (
-                                                content
-                                            )
-                                            new_body = json.dumps(data).encode("utf-8")
-                                            return httpx.Response(
-                                                status_code=response.status_code,
-                                                headers=response.headers,
-                                                content=new_body,
-                                                request=request,
-                                                extensions=response.extensions,
-                                            )
-
-                                        # If not YAML-like, try to fix malformed JSON
-                                        # Handle: ["key": value] -> {"key": value}
-                                        fixed_content = _fix_array_as_object(content)
-                                        # Handle: {"fact_type": DEFAULT} -> {"fact_type": "DEFAULT"}
-                                        fixed_content = _fix_unquoted_json_values(
-                                            fixed_content
-                                        )
-
-                                        if fixed_content != content:
-                                            try:
-                                                # Verify it's valid JSON now
-                                                json.loads(fixed_content)
-                                                logger.info(
-                                                    "Fixing JSON: Early EdgeDuplicate detection (standard path) - fixed malformed JSON"
-                                                )
-                                                data["choices"][0]["message"][
-                                                    "content"
-                                                ] = fixed_content
-                                                new_body = json.dumps(data).encode(
-                                                    "utf-8"
-                                                )
-                                                return httpx.Response(
-                                                    status_code=response.status_code,
-                                                    headers=response.headers,
-                                                    content=new_body,
-                                                    request=request,
-                                                    extensions=response.extensions,
-                                                )
-                                            except json.JSONDecodeError:
-                                                # Still not valid, continue with normal processing
-                                                pass
-
-                                    # 2. Extract JSON structure (find first { or [ and last } or ])
-                                    start_brace = content.find("{")
-                                    start_bracket = content.find("[")
-
-                                    start_idx = -1
-                                    end_char = ""
-
-                                    if start_brace != -1 and (
-                                        start_bracket == -1
-                                        or start_brace < start_bracket
-                                    ):
-                                        start_idx = start_brace
-                                        end_char = "}"
-                                    elif start_bracket != -1:
-                                        start_idx = start_bracket
-                                        end_char = "]"
-                                    if start_idx != -1:
-                                        end_idx = content.rfind(end_char)
-                                        if end_idx != -1 and end_idx > start_idx:
-                                            content = content[start_idx : end_idx + 1]
-
-                                    # 3. Fix List vs Object
-                                    try:
-                                        # Try to parse to check structure
-                                        parsed = json.loads(content)
-                                        modified = False
-
-                                        # If parsed is just a string, it's likely a summary that needs wrapping
-                                        if isinstance(parsed, str):
-                                            logger.info(
-                                                "Fixing JSON: Parsed content is a string, wrapping in 'summary' with empty entities"
-                                            )
-                                            parsed = {
-                                                "summary": parsed,
-                                                "extracted_entities": [],
-                                            }
-                                            modified = True
-
-                                        elif isinstance(parsed, list):
-                                            # Check if original content contains EdgeDuplicate keywords
-                                            # This handles cases like: "[]  (No duplicates found)\n\nContradicted Facts: []"
-                                            edge_dup_keywords = [
-                                                "duplicate_facts",
-                                                "contradicted_facts",
-                                                "fact_type",
-                                                "duplicate facts",
-                                                "contradicted facts",
-                                                "fact type",
-                                                "duplicate detection",
-                                                "contradiction detection",
-                                            ]
-                                            if any(
-                                                kw in original_content.lower()
-                                                for kw in edge_dup_keywords
-                                            ):
-                                                edge_dup_result = (
-                                                    _parse_edge_duplicate_response(
-                                                        original_content
-                                                    )
-                                                )
-                                                if edge_dup_result:
-                                                    logger.info(
-                                                        "Fixing JSON: Detected EdgeDuplicate format in original content (standard path)"
-                                                    )
-                                                    content = json.dumps(
-                                                        edge_dup_result
-                                                    )
-                                                    modified = True
-                                                    parsed = edge_dup_result  # Already a dict now
-                                            elif (
-                                                len(parsed) > 0
-                                                and isinstance(parsed[0], dict)
-                                                and (
-                                                    "source_entity_id" in parsed[0]
-                                                    or "relation_type" in parsed[0]
-                                                )
-                                            ):
-                                                # Detect if this is a list of edges
-                                                logger.info(
-                                                    "Fixing JSON: List found (edges detected), wrapping in 'edges'"
-                                                )
-                                                parsed = {
-                                                    "edges": parsed,
-                                                    "extracted_entities": [],
-                                                }
-                                                modified = True
-                                            else:
-                                                # Default: wrap as entities
-                                                logger.info(
-                                                    "Fixing JSON: List found (entities detected), wrapping in 'extracted_entities'"
-                                                )
-                                                parsed = {
-                                                    "extracted_entities": parsed,
-                                                    "edges": [],
-                                                }
-                                                modified = True
-                                        elif (
-                                            isinstance(parsed, dict)
-                                            and "entities" in parsed
-                                        ):
-                                            logger.info(
-                                                "Fixing JSON: Renaming 'entities' to 'extracted_entities'"
-                                            )
-                                            parsed["extracted_entities"] = parsed.pop(
-                                                "entities"
-                                            )
-                                            modified = True
-
-                                        # Fix facts -> edges
-                                        if (
-                                            isinstance(parsed, dict)
-                                            and "facts" in parsed
-                                        ):
-                                            logger.info(
-                                                "Fixing JSON: Renaming 'facts' to 'edges'"
-                                            )
-                                            parsed["edges"] = parsed.pop("facts")
-                                            modified = True
-
-                                        # Fix entity_name -> name and entity -> name in extracted_entities
-                                        if (
-                                            isinstance(parsed, dict)
-                                            and "extracted_entities" in parsed
-                                        ):
-                                            for entity in parsed["extracted_entities"]:
-                                                if isinstance(entity, dict):
-                                                    if "entity_name" in entity:
-                                                        entity["name"] = entity.pop(
-                                                            "entity_name"
-                                                        )
-                                                        modified = True
-                                                    elif "entity" in entity:
-                                                        entity["name"] = entity.pop(
-                                                            "entity"
-                                                        )
-                                                        modified = True
-
-                                            # Fix NodeResolutions: extracted_entities -> entity_resolutions
-                                            # If the entities contain 'duplicates', it's a resolution result
-                                            entities = parsed["extracted_entities"]
-                                            if (
-                                                entities
-                                                and isinstance(entities, list)
-                                                and len(entities) > 0
-                                            ):
-                                                if (
-                                                    isinstance(entities[0], dict)
-                                                    and "duplicates" in entities[0]
-                                                ):
-                                                    parsed["entity_resolutions"] = (
-                                                        parsed.pop("extracted_entities")
-                                                    )
-                                                    logger.info(
-                                                        "Fixing JSON: Renamed 'extracted_entities' to 'entity_resolutions' (detected resolution format)"
-                                                    )
-                                                    modified = True
-
-                                            # Fix extracted_edges -> edges
-                                            if (
-                                                isinstance(parsed, dict)
-                                                and "extracted_edges" in parsed
-                                            ):
-                                                parsed["edges"] = parsed.pop(
-                                                    "extracted_edges"
-                                                )
-                                                logger.info(
-                                                    "Fixing JSON: Renamed 'extracted_edges' to 'edges'"
-                                                )
-                                                modified = True
-
-                                            if modified:
-                                                content = json.dumps(parsed)
-
-                                    except json.JSONDecodeError:
-                                        # Attempt to repair truncated JSON
-                                        # LLMs often cut off at max tokens, leaving unclosed lists/objects
-                                        if content.strip().startswith(
-                                            "{"
-                                        ) or content.strip().startswith("["):
-                                            repaired = False
-                                            # Common suffixes to try
-                                            suffixes = [
-                                                "}",
-                                                "]",
-                                                "}}",
-                                                "]}",
-                                                "}]",
-                                                "}}}",
-                                                "}}]",
-                                                "}]}",
-                                                "]}}",
-                                                "]}]",
-                                                "]]}",
-                                                "]]]",
-                                                '"}',
-                                                '"]',
-                                                '"]}',
-                                                '"]}]',
-                                                '"]}\n]}',
-                                                "}\n]}",
-                                            ]
-                                            for suffix in suffixes:
-                                                try:
-                                                    temp_content = content + suffix
-                                                    json.loads(temp_content)
-                                                    content = temp_content
-                                                    logger.info(
-                                                        f"Fixing JSON: Repaired truncated JSON with suffix '{suffix}'"
-                                                    )
-                                                    repaired = True
-                                                    break
-                                                except json.JSONDecodeError:
-                                                    continue
-
-                                    # If JSON parsing fails (and repair failed), check if it's plain text that needs wrapping
-                                    if (
-                                        content
-                                        and not content.strip().startswith("{")
-                                        and not content.strip().startswith("[")
-                                    ):
-                                        # Check if this looks like EdgeDuplicate response (YAML-like format)
-                                        edge_dup_keywords = [
-                                            "duplicate_facts",
-                                            "contradicted_facts",
-                                            "fact_type",
-                                        ]
-                                        if any(
-                                            kw in content.lower()
-                                            for kw in edge_dup_keywords
-                                        ):
-                                            edge_dup_result = (
-                                                _parse_edge_duplicate_response(content)
-                                            )
-                                            if edge_dup_result:
-                                                logger.info(
-                                                    "Fixing JSON: Converted EdgeDuplicate YAML-like response to JSON"
-                                                )
-                                                content = json.dumps(edge_dup_result)
-                                        else:
-                                            # Wrap plain text - include both extracted_entities and edges for compatibility
-                                            logger.info(
-                                                "Fixing JSON: Wrapping plain text in summary object with empty entities/edges"
-                                            )
-                                            content = json.dumps(
-                                                {
-                                                    "summary": content.strip(),
-                                                    "extracted_entities": [],
-                                                    "edges": [],
-                                                }
-                                            )
-
-                                    if content != original_content:
-                                        logger.info(
-                                            f"LLM Cleaned Response (HTTP): {content}"
-                                        )
-                                        data["choices"][0]["message"]["content"] = (
-                                            content
-                                        )
-
-                                        # Re-encode response
-                                        new_body = json.dumps(data).encode("utf-8")
-
-                                        return httpx.Response(
-                                            status_code=response.status_code,
-                                            headers=response.headers,
-                                            content=new_body,
-                                            request=request,
-                                            extensions=response.extensions,
-                                        )
-
-                            # Handle non-standard format (e.g., LiteLLM with 'output' field)
-                            elif (
-                                isinstance(data, dict)
-                                and "output" in data
-                                and len(data["output"]) > 0
-                            ):
-                                # For reasoning models, output array contains:
-                                # [{"type": "reasoning", ...}, {"type": "message", ...}]
-                                # We need to extract ONLY the "message" type, skip "reasoning"
-
-                                content = None
-                                output_index = (
-                                    0  # Track which output we use for logging
-                                )
-
-                                # Try to find message-type output (skip reasoning)
-                                for idx, output_item in enumerate(data["output"]):
-                                    if isinstance(output_item, dict):
-                                        item_type = output_item.get("type", "unknown")
-
-                                        # Skip reasoning output
-                                        if item_type == "reasoning":
-                                            logger.info(
-                                                f"Skipping reasoning output at index {idx}"
-                                            )
-                                            continue
-
-                                        # Extract content from message-type output
-                                        if (
-                                            "content" in output_item
-                                            and len(output_item["content"]) > 0
-                                        ):
-                                            if (
-                                                isinstance(
-                                                    output_item["content"][0], dict
-                                                )
-                                                and "text" in output_item["content"][0]
-                                            ):
-                                                content = output_item["content"][0][
-                                                    "text"
-                                                ]
-                                                output_index = idx
-                                                logger.info(
-                                                    f"Using output[{idx}] (type: {item_type})"
-                                                )
-                                                break
-
-                                # Fallback: if no message found, use first output (old behavior)
-                                if content is None:
-                                    try:
-                                        content = data["output"][0]["content"][0][
-                                            "text"
-                                        ]
-                                        output_index = 0
-                                        logger.warning(
-                                            "No message-type output found, using output[0] as fallback"
-                                        )
-                                    except (KeyError, IndexError, TypeError) as e:
-                                        logger.error(
-                                            f"Failed to extract content from output: {e}"
-                                        )
-                                        return response
-
-                                try:
-                                    if content:
-                                        logger.info(
-                                            f"LLM Raw Response (HTTP, non-standard): {content}"
-                                        )
-                                        original_content = content
-
-                                        # Clean markdown
-                                        if "```" in content:
-                                            match = re.search(
-                                                r"```(?:\w+)?\s*(.*?)```",
-                                                content,
-                                                re.DOTALL,
-                                            )
-                                            if match:
-                                                content = match.group(1).strip()
-                                            else:
-                                                content = (
-                                                    content.replace("```json", "")
-                                                    .replace("```", "")
-                                                    .strip()
-                                                )
-
-                                        # EARLY CHECK: If this looks like EdgeDuplicate response, parse it FIRST
-                                        # This must happen BEFORE JSON extraction because YAML-like responses
-                                        # contain [] which would be extracted incorrectly
-                                        edge_dup_keywords_early = [
-                                            "duplicate_facts",
-                                            "contradicted_facts",
-                                            "fact_type",
-                                            "duplicate facts",
-                                            "contradicted facts",
-                                            "fact type",
-                                            "duplicate detection",
-                                            "contradiction detection",
-                                            "duplicated_facts",
-                                        ]
-                                        if any(
-                                            kw in content.lower()
-                                            for kw in edge_dup_keywords_early
-                                        ):
-                                            # First, try to parse as YAML-like format
-                                            edge_dup_result = (
-                                                _parse_edge_duplicate_response(content)
-                                            )
-                                            if edge_dup_result:
-                                                logger.info(
-                                                    "Fixing JSON: Early EdgeDuplicate detection (non-standard path) - converting YAML to JSON"
-                                                )
-                                                content = json.dumps(edge_dup_result)
-                                                # Skip JSON extraction, go directly to response modification
-                                                data["output"][output_index]["content"][
-                                                    0
-                                                ]["text"] = content
-                                                new_body = json.dumps(data).encode(
-                                                    "utf-8"
-                                                )
-                                                return httpx.Response(
-                                                    status_code=response.status_code,
-                                                    headers=response.headers,
-                                                    content=new_body,
-                                                    request=request,
-                                                    extensions=response.extensions,
-                                                )
-
-                                            # If not YAML-like, try to fix malformed JSON
-                                            # Handle: ["key": value] -> {"key": value}
-                                            fixed_content = _fix_array_as_object(
-                                                content
-                                            )
-                                            # Handle: {"fact_type": DEFAULT} -> {"fact_type": "DEFAULT"}
-                                            fixed_content = _fix_unquoted_json_values(
-                                                fixed_content
-                                            )
-
-                                            if fixed_content != content:
-                                                try:
-                                                    # Verify it's valid JSON now
-                                                    json.loads(fixed_content)
-                                                    logger.info(
-                                                        "Fixing JSON: Early EdgeDuplicate detection (non-standard path) - fixed malformed JSON"
-                                                    )
-                                                    data["output"][output_index][
-                                                        "content"
-                                                    ][0]["text"] = fixed_content
-                                                    new_body = json.dumps(data).encode(
-                                                        "utf-8"
-                                                    )
-                                                    return httpx.Response(
-                                                        status_code=response.status_code,
-                                                        headers=response.headers,
-                                                        content=new_body,
-                                                        request=request,
-                                                        extensions=response.extensions,
-                                                    )
-                                                except json.JSONDecodeError:
-                                                    # Still not valid, continue with normal processing
-                                                    pass
-
-                                        # Extract JSON
-                                        start_brace = content.find("{")
-                                        start_bracket = content.find("[")
-
-                                        start_idx = -1
-                                        end_char = ""
-
-                                        if start_brace != -1 and (
-                                            start_bracket == -1
-                                            or start_brace < start_bracket
-                                        ):
-                                            start_idx = start_brace
-                                            end_char = "}"
-                                        elif start_bracket != -1:
-                                            start_idx = start_bracket
-                                            end_char = "]"
-
-                                        if start_idx != -1:
-                                            end_idx = content.rfind(end_char)
-                                            if end_idx != -1 and end_idx > start_idx:
-                                                content = content[
-                                                    start_idx : end_idx + 1
-                                                ]
-
-                                        # Fix List vs Object
-                                        try:
-                                            parsed = json.loads(content)
-                                            modified = False
-
-                                            if isinstance(parsed, list):
-                                                # Check if original content (before extraction) contains EdgeDuplicate keywords
-                                                # This handles cases like: "[]  (No duplicates found)\n\nContradicted Facts: []"
-                                                edge_dup_keywords = [
-                                                    "duplicate_facts",
-                                                    "contradicted_facts",
-                                                    "fact_type",
-                                                    "duplicate facts",
-                                                    "contradicted facts",
-                                                    "fact type",
-                                                    "duplicate detection",
-                                                    "contradiction detection",
-                                                ]
-                                                if any(
-                                                    kw in original_content.lower()
-                                                    for kw in edge_dup_keywords
-                                                ):
-                                                    edge_dup_result = (
-                                                        _parse_edge_duplicate_response(
-                                                            original_content
-                                                        )
-                                                    )
-                                                    if edge_dup_result:
-                                                        logger.info(
-                                                            "Fixing JSON: Detected EdgeDuplicate format in original content (LiteLLM path)"
-                                                        )
-                                                        content = json.dumps(
-                                                            edge_dup_result
-                                                        )
-                                                        modified = True
-                                                        parsed = edge_dup_result  # Already a dict now
-                                                elif (
-                                                    len(parsed) > 0
-                                                    and isinstance(parsed[0], dict)
-                                                    and (
-                                                        "source_entity_id" in parsed[0]
-                                                        or "relation_type" in parsed[0]
-                                                    )
-                                                ):
-                                                    # Detect if this is a list of edges
-                                                    logger.info(
-                                                        "Fixing JSON: List found (edges detected), wrapping in 'edges'"
-                                                    )
-                                                    parsed = {
-                                                        "edges": parsed,
-                                                        "extracted_entities": [],
-                                                    }
-                                                    modified = True
-                                                else:
-                                                    # Default: wrap as entities
-                                                    logger.info(
-                                                        "Fixing JSON: List found (entities detected), wrapping in 'extracted_entities'"
-                                                    )
-                                                    parsed = {
-                                                        "extracted_entities": parsed,
-                                                        "edges": [],
-                                                    }
-                                                    modified = True
-                                            elif (
-                                                isinstance(parsed, dict)
-                                                and "entities" in parsed
-                                            ):
-                                                logger.info(
-                                                    "Fixing JSON: Renaming 'entities' to 'extracted_entities'"
-                                                )
-                                                parsed["extracted_entities"] = (
-                                                    parsed.pop("entities")
-                                                )
-                                                modified = True
-
-                                            # Fix facts -> edges
-                                            if (
-                                                isinstance(parsed, dict)
-                                                and "facts" in parsed
-                                            ):
-                                                logger.info(
-                                                    "Fixing JSON: Renaming 'facts' to 'edges'"
-                                                )
-                                                parsed["edges"] = parsed.pop("facts")
-                                                modified = True
-
-                                            # Fix entity_name -> name and entity -> name in extracted_entities
-                                            if (
-                                                isinstance(parsed, dict)
-                                                and "extracted_entities" in parsed
-                                            ):
-                                                for entity in parsed[
-                                                    "extracted_entities"
-                                                ]:
-                                                    if isinstance(entity, dict):
-                                                        if "entity_name" in entity:
-                                                            entity["name"] = entity.pop(
-                                                                "entity_name"
-                                                            )
-                                                            modified = True
-                                                        elif "entity" in entity:
-                                                            entity["name"] = entity.pop(
-                                                                "entity"
-                                                            )
-                                                            modified = True
-
-                                                # Fix NodeResolutions: extracted_entities -> entity_resolutions
-                                                entities = parsed["extracted_entities"]
-                                                if (
-                                                    entities
-                                                    and isinstance(entities, list)
-                                                    and len(entities) > 0
-                                                ):
-                                                    if (
-                                                        isinstance(entities[0], dict)
-                                                        and "duplicates" in entities[0]
-                                                    ):
-                                                        parsed["entity_resolutions"] = (
-                                                            parsed.pop(
-                                                                "extracted_entities"
-                                                            )
-                                                        )
-                                                        logger.info(
-                                                            "Fixing JSON: Renamed 'extracted_entities' to 'entity_resolutions' (detected resolution format)"
-                                                        )
-                                                        modified = True
-
-                                            # Fix extracted_edges -> edges
-                                            if (
-                                                isinstance(parsed, dict)
-                                                and "extracted_edges" in parsed
-                                            ):
-                                                parsed["edges"] = parsed.pop(
-                                                    "extracted_edges"
-                                                )
-                                                logger.info(
-                                                    "Fixing JSON: Renamed 'extracted_edges' to 'edges'"
-                                                )
-                                                modified = True
-
-                                            if modified:
-                                                content = json.dumps(parsed)
-
-                                        except json.JSONDecodeError:
-                                            # Attempt to repair truncated JSON
-                                            if content.strip().startswith(
-                                                "{"
-                                            ) or content.strip().startswith("["):
-                                                repaired = False
-                                                suffixes = [
-                                                    "}",
-                                                    "]",
-                                                    "}}",
-                                                    "]}",
-                                                    "}]",
-                                                    "}}}",
-                                                    "}}]",
-                                                    "}]}",
-                                                    "]}}",
-                                                    "]}]",
-                                                    "]]}",
-                                                    "]]]",
-                                                    '"}',
-                                                    '"]',
-                                                    '"]}',
-                                                    '"]}]',
-                                                    '"]}\n]}',
-                                                    "}\n]}",
-                                                ]
-                                                for suffix in suffixes:
-                                                    try:
-                                                        temp_content = content + suffix
-                                                        json.loads(temp_content)
-                                                        content = temp_content
-                                                        logger.info(
-                                                            f"Fixing JSON: Repaired truncated JSON with suffix '{suffix}'"
-                                                        )
-                                                        repaired = True
-                                                        break
-                                                    except json.JSONDecodeError:
-                                                        continue
-
-                                        # If JSON parsing fails (and repair failed), check if it's plain text that needs wrapping
-                                        if (
-                                            content
-                                            and not content.strip().startswith("{")
-                                            and not content.strip().startswith("[")
-                                        ):
-                                            # Check if this looks like EdgeDuplicate response (YAML-like format)
-                                            edge_dup_keywords = [
-                                                "duplicate_facts",
-                                                "contradicted_facts",
-                                                "fact_type",
-                                            ]
-                                            if any(
-                                                kw in content.lower()
-                                                for kw in edge_dup_keywords
-                                            ):
-                                                edge_dup_result = (
-                                                    _parse_edge_duplicate_response(
-                                                        content
-                                                    )
-                                                )
-                                                if edge_dup_result:
-                                                    logger.info(
-                                                        "Fixing JSON: Converted EdgeDuplicate YAML-like response to JSON (non-standard)"
-                                                    )
-                                                    content = json.dumps(
-                                                        edge_dup_result
-                                                    )
-                                            else:
-                                                # Wrap plain text - include both extracted_entities and edges for compatibility
-                                                logger.info(
-                                                    "Fixing JSON: Wrapping plain text in summary object with empty entities/edges"
-                                                )
-                                                content = json.dumps(
-                                                    {
-                                                        "summary": content.strip(),
-                                                        "extracted_entities": [],
-                                                        "edges": [],
-                                                    }
-                                                )
-
-                                        if content != original_content:
-                                            logger.info(
-                                                f"LLM Cleaned Response (HTTP, non-standard): {content}"
-                                            )
-                                            data["output"][output_index]["content"][0][
-                                                "text"
-                                            ] = content
-
-                                            # Re-encode response
-                                            new_body = json.dumps(data).encode("utf-8")
-
-                                            return httpx.Response(
-                                                status_code=response.status_code,
-                                                headers=response.headers,
-                                                content=new_body,
-                                                request=request,
-                                                extensions=response.extensions,
-                                            )
-                                except (KeyError, IndexError, TypeError) as e:
-                                    logger.error(
-                                        f"Error parsing non-standard response: {e}"
-                                    )
-                        except Exception as e:
-                            logger.error(f"Error in CleaningHTTPTransport: {e}")
-
-                    return response
-
-            # Create custom HTTP transport for dual-model routing
-            # This allows llm and llm_fast to use different base_url and api_key
-            import httpx
-            import json
-            import re
-            from urllib.parse import urlparse, urlunparse
-
-            class DualModelRoutingTransport(CleaningHTTPTransport):
-                """
-                Extended HTTP transport that routes requests to appropriate endpoint
-                based on model name in the request body, while preserving cleaning
-                and retry functionality from CleaningHTTPTransport.
-                """
-
-                def __init__(
-                    self,
-                    main_base_url,
-                    main_api_key,
-                    fast_base_url,
-                    fast_api_key,
-                    fast_model,
-                ):
-                    super().__init__()
-                    self.main_base_url = main_base_url
-                    self.main_api_key = main_api_key
-                    self.fast_base_url = fast_base_url
-                    self.fast_api_key = fast_api_key
-                    self.fast_model = fast_model
-
-                    # Parse URLs for modification
-                    self.main_parsed = urlparse(main_base_url)
-                    self.fast_parsed = urlparse(fast_base_url)
-
-                async def handle_async_request(self, request):
-                    # Determine which endpoint to use based on model in request
-                    original_url = str(request.url)
-                    original_auth = request.headers.get("authorization", "not set")
-
-                    try:
-                        body = (
-                            request.content.decode("utf-8") if request.content else "{}"
-                        )
-                        try:
-                            # Use original json.loads to avoid our global patch affecting request parsing
-                            data = _original_json_loads(body)
-                            # Handle case where body is not a valid JSON (e.g. empty string)
-                            if not isinstance(data, dict):
-                                data = {}
-                        except json.JSONDecodeError:
-                            # Only log if body is not empty but failed to parse
-                            if body.strip():
-                                logger.warning(
-                                    f"Failed to parse request body JSON: {body[:100]}..."
-                                )
-                            data = {}
-
-                        model = data.get("model", "")
-
-                        logger.info(
-                            f"🔍 Routing request: model={model}, url={original_url}"
-                        )
-                        logger.info(f"   Fast model configured: {self.fast_model}")
-                        logger.info(f"   Auth header: {original_auth[:20]}...")
-
-                        # Route to fast endpoint if request is for fast model
-                        if model == self.fast_model:
-                            logger.info(f"✓ Model matches fast_model!")
-
-                            if self.fast_base_url != self.main_base_url:
-                                # Modify request URL to point to fast endpoint
-                                req_parsed = urlparse(str(request.url))
-                                new_url = urlunparse(
-                                    (
-                                        self.fast_parsed.scheme,
-                                        self.fast_parsed.netloc,
-                                        req_parsed.path,
-                                        req_parsed.params,
-                                        req_parsed.query,
-                                        req_parsed.fragment,
-                                    )
-                                )
-
-                                # Create new request with modified URL
-                                headers_dict = dict(request.headers)
-                                request = httpx.Request(
-                                    method=request.method,
-                                    url=new_url,
-                                    headers=headers_dict,
-                                    content=request.content,
-                                )
-                                logger.info(f"→ Routed to fast endpoint: {new_url}")
-                            else:
-                                logger.info(
-                                    f"→ Same endpoint for both models, no URL change needed"
-                                )
-
-                            # Always update Authorization header to ensure correct key is used for fast model
-                            # This avoids issues where keys might look identical or checks fail
-                            headers_dict = dict(request.headers)
-                            headers_dict["authorization"] = (
-                                f"Bearer {self.fast_api_key}"
-                            )
-
-                            request = httpx.Request(
-                                method=request.method,
-                                url=request.url,
-                                headers=headers_dict,
-                                content=request.content,
-                            )
-                            masked_key = (
-                                self.fast_api_key[:10] + "..."
-                                if self.fast_api_key
-                                else "None"
-                            )
-                            logger.info(f"→ Switched to fast API key: {masked_key}")
-                        else:
-                            logger.info(
-                                f"→ Using main LLM endpoint (model != fast_model)"
-                            )
-
-                    except Exception as e:
-                        logger.error(f"❌ Error in routing logic: {e}", exc_info=True)
-
-                    # Continue with cleaning and retry logic from parent class
-                    logger.info(f"⏳ Calling parent handler (CleaningHTTPTransport)...")
-                    response = await super().handle_async_request(request)
-                    logger.info(
-                        f"✓ Parent handler returned: status={response.status_code}"
-                    )
-                    return response
-
             # Create dual-model routing transport
-            routing_transport = DualModelRoutingTransport(
-                main_base_url=settings.LLM_BASE_URL,
-                main_api_key=settings.LLM_API_KEY,
-                fast_base_url=settings.LLM_FAST_BASE_URL,
-                fast_api_key=settings.LLM_FAST_API_KEY,
-                fast_model=settings.LLM_FAST_MODEL,
-            )
+            routing_transport = _make_cleaning_transport()
 
             # Log configuration
             logger.info(f"Dual-model routing configured:")
@@ -1537,7 +696,7 @@ class GraphitiWrapper:
             )
 
             # Create LLM client with DUAL-MODEL strategy
-            llm_client = OpenAIClient(
+            llm_client = CleaningOpenAIClient(
                 client=llm_async_client,
                 config=LLMConfig(
                     model=settings.LLM_MODEL, small_model=settings.LLM_FAST_MODEL
@@ -1548,7 +707,7 @@ class GraphitiWrapper:
             embedder_async_client = AsyncOpenAI(
                 base_url=settings.EMBEDDING_BASE_URL,
                 api_key=settings.EMBEDDING_API_KEY,
-                http_client=httpx.AsyncClient(transport=CleaningHTTPTransport()),
+                http_client=httpx.AsyncClient(transport=EmbeddingHTTPTransport()),
             )
 
             # Create embedder client with config
@@ -1568,11 +727,18 @@ class GraphitiWrapper:
                 model=settings.RERANKER_MODEL,
             )
 
-            # Initialize Graphiti with custom clients
-            self.client = Graphiti(
+            # Neo4j driver with an explicitly sized connection pool
+            graph_driver = PooledNeo4jDriver(
                 settings.NEO4J_URI,
                 settings.NEO4J_USER,
                 settings.NEO4J_PASSWORD,
+                max_connection_pool_size=settings.NEO4J_POOL_SIZE,
+                connection_acquisition_timeout=settings.NEO4J_ACQUISITION_TIMEOUT,
+            )
+
+            # Initialize Graphiti with custom clients
+            self.client = Graphiti(
+                graph_driver=graph_driver,
                 llm_client=llm_client,
                 embedder=embedder,
                 cross_encoder=reranker,
@@ -1593,6 +759,77 @@ class GraphitiWrapper:
             logger.error(f"Failed to initialize Graphiti client: {e}")
             raise
 
+    def invalidate_user(self, user_id: Optional[str] = None):
+        """
+        Mark a user's graph as changed so cached reads are recomputed.
+        With no user_id (owner unknown), drop all cached reads.
+        """
+        if user_id is None:
+            self._summary_cache.clear()
+            self._search_cache.clear()
+            self._semantic_cache.clear()
+            self._episode_file_cache.clear()
+            return
+        self._user_version[user_id] += 1
+
+    async def bump_graph_version(self, user_id: Optional[str] = None):
+        """
+        Bump the user's graph version in Redis so other adapter processes
+        stop serving cached summaries. With no user_id, bump it for all users.
+        """
+        key = "graph_version" if user_id is None else f"graph_version:{user_id}"
+        try:
+            await self._redis.incr(key)
+        except Exception as e:
+            logger.warning(f"Error bumping graph version in Redis: {e}")
+
+    async def _shared_graph_version(self, user_id: str) -> Optional[tuple]:
+        """
+        (user, global) graph versions from Redis, which also cover writes made
+        by the worker and other adapter processes; None if Redis is unreachable
+        """
+        try:
+            return tuple(
+                int(v or 0)
+                for v in await self._redis.mget(
+                    f"graph_version:{user_id}", "graph_version"
+                )
+            )
+        except Exception as e:
+            logger.warning(f"Error reading graph version from Redis: {e}")
+            return None
+
+    async def _graph_version(self, user_id: str) -> tuple:
+        """Version for keying a user's cached reads: local and shared counters"""
+        return (self._user_version[user_id], await self._shared_graph_version(user_id))
+
+    async def ensure_indexes(self):
+        """Create the Neo4j indexes the adapter's queries rely on."""
+        created = 0
+        for query in _Q_INDEXES:
+            # One failing index (e.g. a conflicting existing one) doesn't
+            # stop the others from being created
+            try:
+                await self.client.driver.execute_query(query, database_="neo4j")
+                created += 1
+            except Exception as e:
+                logger.error(f"Error creating index ({query}): {e}")
+        logger.info(f"Ensured {created}/{len(_Q_INDEXES)} Neo4j indexes")
+
+    async def backfill_episode_group_ids(self):
+        """Set group_id on episodes stored before it was used to scope them."""
+        try:
+            async with self.client.driver.session() as session:
+                result = await session.run(_Q_BACKFILL_EPISODE_GROUP_IDS)
+                record = await result.single()
+            updated = record["updated"] if record else 0
+            if updated:
+                logger.info(f"Backfilled group_id on {updated} episodes")
+                self.invalidate_user()
+                await self.bump_graph_version()
+        except Exception as e:
+            logger.error(f"Error backfilling episode group_ids: {e}")
+
     async def save_pending_episode(
         self, user_id: str, text: str, metadata: Optional[Dict[str, Any]] = None
     ) -> str:
@@ -1600,51 +837,60 @@ class GraphitiWrapper:
         Save a temporary PendingEpisode node to make the message immediately available
         before heavy processing completes.
         """
+        uuids = await self.save_pending_episodes_batch(user_id, [text], [metadata])
+        return uuids[0] if uuids else None
+
+    async def save_pending_episodes_batch(
+        self,
+        user_id: str,
+        texts: List[str],
+        metadatas: Optional[List[Optional[Dict[str, Any]]]] = None,
+    ) -> List[str]:
+        """
+        Save several PendingEpisode nodes for one user in a single query.
+        Returns their UUIDs, or an empty list on failure.
+        """
+        if not texts:
+            return []
+        if metadatas is None:
+            metadatas = [None] * len(texts)
+        if len(metadatas) != len(texts):
+            raise ValueError("texts and metadatas must have the same length")
+
         try:
-            driver = self.client.driver
-            uuid_str = str(uuid.uuid4())
-            # Use ISO format string for consistency with Graphiti
-            created_at = datetime.now(timezone.utc).isoformat()
-
-            source = "User"
-            file_name = None
-            if metadata:
-                source = metadata.get("source", source)
-                file_name = metadata.get("file_name")
-
-            query = """
-            MERGE (u:User {id: $user_id})
-            CREATE (p:PendingEpisode {
-                uuid: $uuid,
-                content: $text,
-                created_at: $created_at,
-                source: $source,
-                file_name: $file_name,
-                status: 'pending',
-                user_id: $user_id
-            })
-            MERGE (u)-[:HAS_PENDING]->(p)
-            RETURN p.uuid as uuid
-            """
+            # Use ISO format strings for consistency with Graphiti. Offset each
+            # by 1µs so pending episodes keep their submission order.
+            now = datetime.now(timezone.utc)
+            rows = []
+            for i, (text, metadata) in enumerate(zip(texts, metadatas)):
+                metadata = metadata or {}
+                rows.append(
+                    {
+                        "uuid": str(uuid.uuid4()),
+                        "content": text,
+                        "created_at": (now + timedelta(microseconds=i)).isoformat(),
+                        "source": metadata.get("source", "User"),
+                        "file_name": metadata.get("file_name"),
+                    }
+                )
 
-            await driver.execute_query(
-                query,
+            await self.client.driver.execute_query(
+                _Q_SAVE_PENDING_EPISODES,
                 user_id=user_id,
-                uuid=uuid_str,
-                text=text,
-                created_at=created_at,
-                source=source,
-                file_name=file_name,
+                rows=rows,
                 database_="neo4j",
             )
 
-            logger.info(
-                f"Saved PendingEpisode for user {user_id}: {uuid_str} (file: {file_name})"
-            )
-            return uuid_str
+            if len(rows) == 1:
+                logger.info(
+                    f"Saved PendingEpisode for user {user_id}: {rows[0]['uuid']} (file: {rows[0]['file_name']})"
+                )
+            else:
+                logger.info(f"Saved {len(rows)} PendingEpisodes for user {user_id}")
+            return [row["uuid"] for row in rows]
         except Exception as e:
             logger.error(f"Error saving pending episode: {e}")
-            return None
+            return []
 
     async def delete_pending_episode(self, user_id: str, text: str):
         """
@@ -1653,13 +899,8 @@ class GraphitiWrapper:
         """
         try:
             driver = self.client.driver
-            query = """
-            MATCH (p:PendingEpisode)
-            WHERE p.user_id = $user_id AND p.content = $text
-            DETACH DELETE p
-            """
             await driver.execute_query(
-                query, user_id=user_id, text=text, database_="neo4j"
+                _Q_DELETE_PENDING_EPISODE, user_id=user_id, text=text, database_="neo4j"
             )
             logger.info(f"Cleaned up PendingEpisode for user {user_id}")
         except Exception as e:
@@ -1676,13 +917,9 @@ class GraphitiWrapper:
                 datetime.now(timezone.utc) - timedelta(minutes=minutes)
             ).isoformat()
 
-            query = """
-            MATCH (p:PendingEpisode)
-            WHERE p.created_at < $cutoff
-            RETURN p.user_id as user_id, p.content as content, p.source as source, p.uuid as uuid
-            """
-
-            result = await driver.execute_query(query, cutoff=cutoff, database_="neo4j")
+            result = await driver.execute_query(
+                _Q_GET_STUCK_PENDING_EPISODES, cutoff=cutoff, database_="neo4j"
+            )
 
             stuck = []
             if result.records:
@@ -1700,17 +937,11 @@ class GraphitiWrapper:
             logger.error(f"Error getting stuck episodes: {e}")
             return []
 
-    async def add_episode(
-        self, user_id: str, text: str, metadata: Optional[Dict[str, Any]] = None
-    ) -> str:
+    @staticmethod
+    def _episode_source(metadata: Optional[Dict[str, Any]]) -> tuple:
         """
-        Add an episode (memory) to the knowledge graph.
-        Called as background task after save_pending_episode.
+        Build the Graphiti source_description and extract file_name from metadata.
         """
-        # 1. Create episode name
-        timestamp = datetime.now(timezone.utc).isoformat()
-        episode_name = f"{user_id}_{timestamp}"
-
         source_description = "User Input"
         role = "user"
         file_name = None
@@ -1724,6 +955,21 @@ class GraphitiWrapper:
         if file_name:
             final_source = f"{source_description} (file: {file_name})"
 
+        return final_source, file_name
+
+    async def add_episode(
+        self, user_id: str, text: str, metadata: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Add an episode (memory) to the knowledge graph.
+        Called as background task after save_pending_episode.
+        """
+        # 1. Create episode name (single timestamp reused as reference_time)
+        now = datetime.now(timezone.utc)
+        episode_name = f"{user_id}_{now.isoformat()}"
+
+        final_source, file_name = self._episode_source(metadata)
+
         logger.info(
             f"Adding episode for user {user_id} (len: {len(text)}) (file: {file_name})"
         )
@@ -1735,26 +981,26 @@ class GraphitiWrapper:
                 episode_body=text,
                 source=EpisodeType.text,
                 source_description=final_source,
-                reference_time=datetime.now(timezone.utc),
+                reference_time=now,
                 group_id=user_id,  # Critical: isolate data by user
             )
 
             # 3. Tag with file_name if provided (Post-processing check)
             if file_name:
                 driver = self.client.driver
-                tag_query = """
-                MATCH (e:Episodic {name: $name})
-                SET e.file_name = $file_name
-                RETURN e
-                """
                 await driver.execute_query(
-                    tag_query, name=episode_name, file_name=file_name, database_="neo4j"
+                    _Q_TAG_EPISODE_FILE,
+                    name=episode_name,
+                    file_name=file_name,
+                    database_="neo4j",
                 )
                 logger.debug(
                     f"Tagged episode {episode_name} with file_name: {file_name}"
                 )
 
             logger.info(f"Successfully added episode: {episode_name}")
+            self.invalidate_user(user_id)
+            await self.bump_graph_version(user_id)
 
             # 4. Cleanup PendingEpisode after successful processing
             await self.delete_pending_episode(user_id, text)
@@ -1766,6 +1012,111 @@ class GraphitiWrapper:
             # We DO NOT delete the pending episode on error, so retry logic can pick it up
             raise e
 
+    async def add_episodes_bulk(
+        self,
+        user_id: str,
+        texts: List[str],
+        metadatas: Optional[List[Optional[Dict[str, Any]]]] = None,
+    ) -> List[str]:
+        """
+        Add several episodes for one user in a single Graphiti bulk operation.
+        Intended for ingest workloads (history import, backfill) where per-episode
+        LLM round-trips dominate.
+
+        Note: Graphiti's bulk path skips edge invalidation and date extraction,
+        so use add_episode for live conversation turns.
+        """
+        if not texts:
+            return []
+        if metadatas is None:
+            metadatas = [None] * len(texts)
+        if len(metadatas) != len(texts):
+            raise ValueError("texts and metadatas must have the same length")
+
+        # Offset each timestamp by 1µs so episode names stay unique within the batch
+        now = datetime.now(timezone.utc)
+        raw_episodes = []
+        file_tags = []
+        for i, (text, metadata) in enumerate(zip(texts, metadatas)):
+            reference_time = now + timedelta(microseconds=i)
+            episode_name = f"{user_id}_{reference_time.isoformat()}"
+            final_source, file_name = self._episode_source(metadata)
+            raw_episodes.append(
+                RawEpisode(
+                    name=episode_name,
+                    content=text,
+                    source=EpisodeType.text,
+                    source_description=final_source,
+                    reference_time=reference_time,
+                )
+            )
+            if file_name:
+                file_tags.append({"name": episode_name, "file_name": file_name})
+
+        logger.info(f"Adding {len(raw_episodes)} episodes in bulk for user {user_id}")
+
+        try:
+            await self.client.add_episode_bulk(raw_episodes, group_id=user_id)
+
+            driver = self.client.driver
+            if file_tags:
+                await driver.execute_query(
+                    _Q_TAG_EPISODE_FILES, tags=file_tags, database_="neo4j"
+                )
+            # After tagging, so reads cached in between are invalidated too
+            self.invalidate_user(user_id)
+            await self.bump_graph_version(user_id)
+
+            # Cleanup PendingEpisodes after successful processing
+            await driver.execute_query(
+                _Q_DELETE_PROCESSED_PENDING_EPISODES,
+                user_id=user_id,
+                texts=list(texts),
+                database_="neo4j",
+            )
+
+            logger.info(
+                f"Successfully added {len(raw_episodes)} episodes in bulk for user {user_id}"
+            )
+            return [ep.name for ep in raw_episodes]
+
+        except Exception as e:
+            logger.error(f"Error adding episodes in bulk for user {user_id}: {e}")
+            # Pending episodes are kept so retry logic can pick them up
+            raise e
+
+    async def _get_episode_file_names(
+        self, user_id: str, episode_uuids: set
+    ) -> Dict[str, Optional[str]]:
+        """
+        Map episode UUIDs to file_name. Served from an LRU cache keyed by the
+        user's graph version; only misses are fetched, in one lookup.
+        """
+        cache = self._episode_file_cache
+        version = await self._graph_version(user_id)
+        episode_file_map = {}
+        misses = []
+        for ep_uuid in episode_uuids:
+            key = (user_id, version, ep_uuid)
+            if key in cache:
+                cache.move_to_end(key)
+                episode_file_map[ep_uuid] = cache[key]
+            else:
+                misses.append(ep_uuid)
+
+        if misses:
+            result_records = await self.client.driver.execute_query(
+                _Q_GET_EPISODE_FILE_NAMES, uuids=misses, database_="neo4j"
+            )
+            for record in result_records.records:
+                file_name = record.get("file_name")
+                episode_file_map[record["uuid"]] = file_name
+                cache[(user_id, version, record["uuid"])] = file_name
+            while len(cache) > EPISODE_FILE_CACHE_SIZE:
+                cache.popitem(last=False)
+
+        return episode_file_map
+
     async def search(
         self,
         user_id: str,
@@ -1775,31 +1126,123 @@ class GraphitiWrapper:
     ) -> List[MemoryHit]:
         """
         Search for relevant memories (edges) in the knowledge graph
+
+        Results are cached for SEARCH_CACHE_TTL seconds, keyed by the exact
+        query and the user's graph version (local and shared through Redis, so
+        writes by the worker or other processes show up). If
+        SEARCH_SEMANTIC_CACHE_THRESHOLD is set, a query whose embedding is that
+        similar to a cached one reuses its results too.
         """
+        version = await self._graph_version(user_id)
+        key = (user_id, version, query, limit, center_node_uuid)
+        # Semantic matches must share everything in the key but the query
+        scope = (version, limit, center_node_uuid)
+        now = time.monotonic()
+
+        cached = self._search_cache.get(key)
+        if cached is not None and cached[0] > now:
+            self._search_cache.move_to_end(key)
+            return list(cached[1])
+
+        threshold = settings.SEARCH_SEMANTIC_CACHE_THRESHOLD
+        query_embedding = None
+        if threshold > 0:
+            # The semantic tier is best-effort: if the embedder fails, search
+            # as if it were off
+            try:
+                query_embedding = _normalize(
+                    await self.client.embedder.create(
+                        input_data=[query.replace("\n", " ")]
+                    )
+                )
+            except Exception as e:
+                logger.warning(f"Error embedding query for semantic cache: {e}")
+        if query_embedding is not None:
+            for _, entry_scope, embedding, hits in (
+                self._semantic_entries(user_id, now) or ()
+            ):
+                if (
+                    entry_scope == scope
+                    and _dot(embedding, query_embedding) >= threshold
+                ):
+                    logger.info(f"Semantic search cache hit for user {user_id}")
+                    return list(hits)
+
+        try:
+            hits = await self._search(user_id, query, limit, center_node_uuid)
+        except Exception:
+            return []
+
+        expires = now + SEARCH_CACHE_TTL
+        self._search_cache[key] = (expires, hits)
+        if len(self._search_cache) > SEARCH_CACHE_SIZE:
+            self._search_cache.popitem(last=False)
+        if query_embedding is not None:
+            entries = self._semantic_entries(user_id, now)
+            if entries is None:
+                entries = self._semantic_cache[user_id] = []
+                if len(self._semantic_cache) > SEMANTIC_CACHE_USERS:
+                    self._semantic_cache.popitem(last=False)
+            entries.append((expires, scope, query_embedding, hits))
+            del entries[:-SEMANTIC_CACHE_PER_USER]
+        return list(hits)
+
+    def _semantic_entries(self, user_id: str, now: float) -> Optional[list]:
+        """
+        A user's semantic cache entries with expired ones dropped, marking
+        the user as recently used; None if the user has none cached.
+        """
+        entries = self._semantic_cache.get(user_id)
+        if entries is None:
+            return None
+        self._semantic_cache.move_to_end(user_id)
+        entries[:] = [entry for entry in entries if entry[0] > now]
+        return entries
+
+    async def _search(
+        self,
+        user_id: str,
+        query: str,
+        limit: int = 10,
+        center_node_uuid: Optional[str] = None,
+    ) -> List[MemoryHit]:
+        """Uncached search; raises on failure so errors are never cached."""
         try:
             logger.info(f"Searching for user {user_id}: {query}")
 
             # Perform hybrid search with RERANKER (using search_)
-            # We must copy the config to set the limit safely
-            search_config = copy.deepcopy(COMBINED_HYBRID_SEARCH_CROSS_ENCODER)
-            search_config.limit = limit
+            # Copy the config to set the limit safely. A shallow copy is enough:
+            # Graphiti only reads the nested edge/node/episode configs
+            search_config = COMBINED_HYBRID_SEARCH_CROSS_ENCODER.model_copy(
+                update={"limit": limit}
+            )
 
-            try:
-                # search_ returns SearchResults object containing nodes and edges
-                search_results = await self.client.search_(
-                    query=query,
-                    center_node_uuid=center_node_uuid,
-                    config=search_config,
-                    group_ids=[user_id],
-                )
-                # Extract edges from results
-                results = search_results.edges
-                logger.info(f"✓ Reranker search successful, got {len(results)} results")
+            results = None
+            if time.monotonic() >= self._reranker_failed_until:
+                try:
+                    # search_ returns SearchResults object containing nodes and edges
+                    search_results = await self.client.search_(
+                        query=query,
+                        center_node_uuid=center_node_uuid,
+                        config=search_config,
+                        group_ids=[user_id],
+                    )
+                    # Extract edges from results
+                    results = search_results.edges
+                    logger.info(
+                        f"✓ Reranker search successful, got {len(results)} results"
+                    )
 
-            except Exception as e:
-                logger.warning(
-                    f"⚠️ Reranker search failed ({e}), falling back to basic search"
-                )
+                except Exception as e:
+                    self._reranker_failed_until = (
+                        time.monotonic() + RERANKER_FAILURE_BACKOFF
+                    )
+                    logger.warning(
+                        f"⚠️ Reranker search failed ({e}), falling back to basic search "
+                        f"for {RERANKER_FAILURE_BACKOFF:.0f}s"
+                    )
+
+            if results is None:
                 # Fallback to basic search (no reranker)
                 results = await self.client.search(
                     query=query,
@@ -1808,58 +1251,39 @@ class GraphitiWrapper:
                     group_ids=[user_id],
                 )
 
-            # Collect episode UUIDs from results to fetch file_name metadata
-            episode_uuids = set()
-            for result in results[:limit]:
-                # Extract episode UUID from edges
-                # EntityEdge objects have an 'episodes' list attribute
-                ep_list = getattr(result, "episodes", [])
-                if ep_list and len(ep_list) > 0:
-                    episode_uuids.add(ep_list[0])
-
-            # Fetch file_name for episodes in batch
-            episode_file_map = {}
-            if episode_uuids:
-                driver = self.client.driver
-                query = """
-                MATCH (e:Episodic)
-                WHERE e.uuid IN $uuids
-                RETURN e.uuid AS uuid, e.file_name AS file_name
-                """
-                result_records = await driver.execute_query(
-                    query, uuids=list(episode_uuids), database_="neo4j"
-                )
-                for record in result_records.records:
-                    episode_file_map[record["uuid"]] = record.get("file_name")
+            # Episode UUID per result, used to fetch file_name metadata
+            # EntityEdge objects have an 'episodes' list attribute
+            results = results[:limit]
+            result_episodes = []
+            for result in results:
+                ep_list = getattr(result, "episodes", None)
+                result_episodes.append(ep_list[0] if ep_list else None)
+            episode_uuids = {ep for ep in result_episodes if ep}
+
+            episode_file_map = await self._get_episode_file_names(
+                user_id, episode_uuids
+            )
 
             # Convert to MemoryHit format with file_name in metadata
             hits = []
-            for result in results[:limit]:
-                # Get episode UUID again for mapping
-                ep_list = getattr(result, "episodes", [])
-                ep_uuid = ep_list[0] if ep_list and len(ep_list) > 0 else None
-
+            for result, ep_uuid in zip(results, result_episodes):
                 file_name = episode_file_map.get(ep_uuid) if ep_uuid else None
 
-                # Check for score, default to 1.0 (basic search often lacks score in Edge objects)
-                score = getattr(result, "score", 1.0)
+                fact, edge_uuid, source, target, valid_at, invalid_at, created_at = (
+                    _EDGE_FIELDS(result)
+                )
 
                 hit = MemoryHit(
-                    fact=result.fact,
-                    score=score,
-                    uuid=result.uuid,
-                    created_at=getattr(
-                        result, "created_at", datetime.now(timezone.utc)
-                    ),
+                    fact=fact,
+                    # Basic search often lacks score in Edge objects, default to 1.0
+                    score=getattr(result, "score", 1.0),
+                    uuid=edge_uuid,
+                    created_at=created_at,
                     metadata={
-                        "source_node_uuid": getattr(result, "source_node_uuid", None),
-                        "target_node_uuid": getattr(result, "target_node_uuid", None),
-                        "valid_at": str(result.valid_at)
-                        if hasattr(result, "valid_at") and result.valid_at
-                        else None,
-                        "invalid_at": str(result.invalid_at)
-                        if hasattr(result, "invalid_at") and result.invalid_at
-                        else None,
+                        "source_node_uuid": source,
+                        "target_node_uuid": target,
+                        "valid_at": str(valid_at) if valid_at else None,
+                        "invalid_at": str(invalid_at) if invalid_at else None,
                         "file_name": file_name,
                         "episode_uuid": ep_uuid,
                     },
@@ -1871,7 +1295,7 @@ class GraphitiWrapper:
 
         except Exception as e:
             logger.error(f"Error searching: {e}")
-            return []
+            raise
 
     async def get_user_graph(self, user_id: str) -> Dict[str, Any]:
         """
@@ -1892,11 +1316,11 @@ class GraphitiWrapper:
             # Debug: Check what episodes exist for this user
             debug_query = """
             MATCH (e:Episodic)
-            WHERE e.name STARTS WITH $user_prefix
+            WHERE e.group_id = $user_id
             RETURN COUNT(e) as episode_count, COLLECT(e.name)[0..5] as sample_names
             """
             debug_result = await driver.execute_query(
-                debug_query, user_prefix=f"{user_id}_", database_="neo4j"
+                debug_query, user_id=user_id, database_="neo4j"
             )
             if debug_result.records:
                 logger.info(
@@ -1906,14 +1330,11 @@ class GraphitiWrapper:
             # Debug: Check if there are PendingEpisode nodes (unprocessed)
             debug_pending = """
             MATCH (p:PendingEpisode)
-            WHERE p.user_id STARTS WITH $user_prefix OR p.user_id = $user_id
+            WHERE p.user_id = $user_id
             RETURN COUNT(p) as pending_count
             """
             pending_result = await driver.execute_query(
-                debug_pending,
-                user_prefix=f"{user_id}_",
-                user_id=user_id,
-                database_="neo4j",
+                debug_pending, user_id=user_id, database_="neo4j"
             )
             if pending_result.records:
                 logger.info(
@@ -1973,12 +1394,12 @@ class GraphitiWrapper:
             # Debug: Check if user episodes have MENTIONS relationships
             debug_mentions = """
             MATCH (e:Episodic)
-            WHERE e.name STARTS WITH $user_prefix
+            WHERE e.group_id = $user_id
             OPTIONAL MATCH (e)-[:MENTIONS]->(n:Entity)
             RETURN COUNT(DISTINCT e) as episodes_with_mentions, COUNT(DISTINCT n) as mentioned_entities
             """
             mentions_result = await driver.execute_query(
-                debug_mentions, user_prefix=f"{user_id}_", database_="neo4j"
+                debug_mentions, user_id=user_id, database_="neo4j"
             )
             if mentions_result.records:
                 logger.info(
@@ -2004,66 +1425,20 @@ class GraphitiWrapper:
 
             # Main query - use group_id since Graphiti correctly sets it during processing
             # Debug showed entities DO have group_id, so this is safe and performant
-            query = """
-            MATCH (e:Episodic)
-            WHERE e.name STARTS WITH $user_prefix
-            MATCH (e)-[:MENTIONS]->(n:Entity)
-            WHERE n.group_id = $user_id
-            OPTIONAL MATCH (n)-[r:RELATES_TO]-(m:Entity)
-            WHERE m.group_id = $user_id
-            
-            RETURN 
-                collect(DISTINCT n) as entities,
-                collect(DISTINCT r) as relationships
-            """
-
             result = await driver.execute_query(
-                query, user_prefix=f"{user_id}_", user_id=user_id, database_="neo4j"
+                _Q_GET_USER_GRAPH,
+                user_id=user_id,
+                database_="neo4j",
             )
 
-            # Convert to Cytoscape.js format
+            # The query already returns Cytoscape.js elements
             nodes = []
             edges = []
 
             if result.records:
                 record = result.records[0]
-
-                # Process entity nodes
-                for entity in record["entities"]:
-                    nodes.append(
-                        {
-                            "data": {
-                                "id": entity["uuid"],
-                                "label": entity.get("name", "Unknown"),
-                                "summary": (
-                                    entity.get("summary", "")[:200]
-                                    if entity.get("summary")
-                                    else ""
-                                ),
-                                "created_at": str(entity["created_at"])
-                                if "created_at" in entity
-                                else None,
-                            }
-                        }
-                    )
-
-                # Process relationships
-                for rel in record["relationships"]:
-                    if rel:  # Skip None relationships
-                        edges.append(
-                            {
-                                "data": {
-                                    "id": rel["uuid"],
-                                    "source": rel["source_node_uuid"],
-                                    "target": rel["target_node_uuid"],
-                                    "label": (
-                                        rel.get("fact", "")[:100]
-                                        if rel.get("fact")
-                                        else ""
-                                    ),
-                                }
-                            }
-                        )
+                nodes = record["nodes"]
+                edges = record["edges"]
 
             logger.info(
                 f"Retrieved {len(nodes)} nodes and {len(edges)} edges for user {user_id}"
@@ -2086,6 +1461,28 @@ class GraphitiWrapper:
             Text summary
         """
         try:
+            version = await self._graph_version(user_id)
+            shared_version = version[1]
+
+            # Graph is unchanged since the last summary for this version: reuse it
+            cache_key = (user_id, version)
+            cached = self._summary_cache.get(cache_key)
+            if cached is not None:
+                self._summary_cache.move_to_end(cache_key)
+                return cached
+
+            redis_key = None
+            if shared_version is not None:
+                redis_key = f"summary:{user_id}:{shared_version[0]}:{shared_version[1]}"
+                try:
+                    cached = await self._redis.get(redis_key)
+                except Exception as e:
+                    logger.warning(f"Error reading summary from Redis: {e}")
+                if cached is not None:
+                    summary = cached.decode()
+                    self._remember_summary(cache_key, summary)
+                    return summary
+
             # Search for user-related facts
             results = await self.search(user_id, f"facts about {user_id}", limit=10)
 
@@ -2097,12 +1494,26 @@ class GraphitiWrapper:
             for i, hit in enumerate(results[:5], 1):
                 summary_parts.append(f"{i}. {hit.fact}")
 
-            return "\n".join(summary_parts)
+            summary = "\n".join(summary_parts)
+            self._remember_summary(cache_key, summary)
+            if redis_key is not None:
+                try:
+                    await self._redis.setex(redis_key, SUMMARY_REDIS_TTL, summary)
+                except Exception as e:
+                    logger.warning(f"Error storing summary in Redis: {e}")
+
+            return summary
 
         except Exception as e:
             logger.error(f"Error generating summary: {e}")
             return f"Error generating summary: {str(e)}"
 
+    def _remember_summary(self, cache_key: tuple, summary: str):
+        """Keep a summary in the in-process LRU cache"""
+        self._summary_cache[cache_key] = summary
+        if len(self._summary_cache) > SUMMARY_CACHE_SIZE:
+            self._summary_cache.popitem(last=False)
+
     async def delete_user(self, user_id: str) -> bool:
         """
         Delete all data for a user from Neo4j
@@ -2117,59 +1528,30 @@ class GraphitiWrapper:
             logger.info(f"Deleting all data for user: {user_id}")
 
             # Strategy:
-            # 1. Find and delete all episodes for this user (by name pattern)
+            # 1. Find and delete all episodes for this user (by group_id)
             # 2. Delete nodes that are only connected to these episodes
             # 3. Delete edges that reference deleted nodes
 
             # Get Neo4j driver from graphiti client
             driver = self.client.driver
 
-            # Cypher query to delete episodes and their associated data
-            query = """
-            // Find all episodes for this user
-            MATCH (e:Episodic)
-            WHERE e.name STARTS WITH $user_prefix
-            
-            // Match connected nodes
-            OPTIONAL MATCH (e)--(n)
-            
-            // Use DETACH DELETE to automatically remove all relationships
-            DETACH DELETE e, n
-            
-            RETURN count(DISTINCT e) as episodes_deleted
-            """
-
-            # Execute deletion by episode connection
+            # Delete the user's episodes and their connected nodes, then any
+            # remaining nodes of the group, in one round-trip and transaction
             result = await driver.execute_query(
-                query, user_prefix=f"{user_id}_", database_="neo4j"
-            )
-
-            episodes_deleted = (
-                result.records[0]["episodes_deleted"] if result.records else 0
-            )
-
-            # Fallback: Delete by group_id if it exists (handles orphaned nodes)
-            # Graphiti often uses group_id for tenancy
-            cleanup_query = """
-            MATCH (n)
-            WHERE n.group_id = $user_id
-            DETACH DELETE n
-            RETURN count(n) as nodes_deleted
-            """
-
-            cleanup_result = await driver.execute_query(
-                cleanup_query, user_id=user_id, database_="neo4j"
+                _Q_DELETE_USER,
+                user_id=user_id,
+                database_="neo4j",
             )
 
-            nodes_deleted = (
-                cleanup_result.records[0]["nodes_deleted"]
-                if cleanup_result.records
-                else 0
-            )
+            record = result.records[0] if result.records else {}
+            episodes_deleted = record.get("episodes_deleted", 0)
+            nodes_deleted = record.get("nodes_deleted", 0)
 
             logger.info(
                 f"Deleted {episodes_deleted} episodes and {nodes_deleted} orphaned nodes for user {user_id}"
             )
+            self.invalidate_user(user_id)
+            await self.bump_graph_version(user_id)
 
             return True
 
@@ -2185,49 +1567,28 @@ class GraphitiWrapper:
             logger.info(f"Getting files for user: {user_id}")
             driver = self.client.driver
 
-            query = """
-            CALL {
-                MATCH (e:Episodic)
-                WHERE e.name STARTS WITH $user_prefix AND e.file_name IS NOT NULL
-                RETURN e.file_name as file_name, count(e) as chunk_count, max(e.created_at) as last_modified
-                
-                UNION ALL
-                
-                MATCH (p:PendingEpisode)
-                WHERE p.user_id = $user_id AND p.file_name IS NOT NULL
-                RETURN p.file_name as file_name, count(p) as chunk_count, max(p.created_at) as last_modified
-            }
-            WITH file_name, sum(chunk_count) as total_chunks, max(last_modified) as last_modified
-            RETURN file_name, total_chunks, toString(last_modified) as created_at
-            ORDER BY last_modified DESC
-            """
-
-            params = {
-                "user_prefix": f"{user_id}_",
-                "user_id": user_id,
-            }
-
-            result = await driver.execute_query(query, **params)
-
-            files = []
-            if result.records:
-                for record in result.records:
-                    files.append(
-                        {
-                            "file_name": record["file_name"],
-                            "chunk_count": record["total_chunks"],
-                            "created_at": record["created_at"],
-                        }
-                    )
+            result = await driver.execute_query(
+                _Q_GET_USER_FILES, user_id=user_id, database_="neo4j"
+            )
 
-            return files
+            return [
+                {
+                    "file_name": record["file_name"],
+                    "chunk_count": record["total_chunks"],
+                    "created_at": _isoformat(record["created_at"]),
+                }
+                for record in result.records
+            ]
         except Exception as e:
             logger.error(f"Error getting files for user {user_id}: {e}")
             raise e
 
-    async def get_user_episodes(self, user_id: str, limit: int = None) -> list:
+    async def get_user_episodes(
+        self, user_id: str, limit: int = None, include_content: bool = True
+    ) -> list:
         """
         Get list of episodes for a user, including pending ones.
+        With include_content=False only metadata is returned, without content.
         """
         try:
             logger.info(
@@ -2235,39 +1596,15 @@ class GraphitiWrapper:
             )
             driver = self.client.driver
 
-            # Use CALL subquery to properly wrap UNION and apply LIMIT to the final result
-            query = """
-            CALL {
-                // 1. Get processed episodes
-                MATCH (e:Episodic)
-                WHERE e.name STARTS WITH $user_prefix AND e.file_name IS NULL
-                RETURN e.uuid as uuid, e.name as name, toString(e.created_at) as created_at, 
-                       e.source_description as source, 
-                       coalesce(e.content, e.episode_body, "") as content,
-                       'processed' as status
-                
-                UNION ALL
-                
-                // 2. Get pending episodes
-                MATCH (p:PendingEpisode)
-                WHERE p.user_id = $user_id AND p.file_name IS NULL
-                RETURN p.uuid as uuid, "pending_" + p.uuid as name, toString(p.created_at) as created_at,
-                       p.source as source,
-                       p.content as content,
-                       'pending' as status
-            }
-            RETURN uuid, name, created_at, source, content, status
-            ORDER BY created_at DESC
-            """
-
             params = {
-                "user_prefix": f"{user_id}_",
                 "user_id": user_id,
+                "include_content": include_content,
                 "database_": "neo4j",
             }
 
+            query = _Q_GET_USER_EPISODES
             if limit is not None and limit > 0:
-                query += "\nLIMIT $limit"
+                query = _Q_GET_USER_EPISODES_LIMIT
                 params["limit"] = limit
 
             result = await driver.execute_query(query, **params)
@@ -2283,15 +1620,15 @@ class GraphitiWrapper:
                     else:
                         processed_count += 1
 
-                    episodes.append(
-                        {
-                            "uuid": record["uuid"],
-                            "created_at": record["created_at"],
-                            "source": record["source"],
-                            "content": record["content"],
-                            "status": record["status"],
-                        }
-                    )
+                    episode = {
+                        "uuid": record["uuid"],
+                        "created_at": _isoformat(record["created_at"]),
+                        "source": record["source"],
+                        "status": record["status"],
+                    }
+                    if include_content:
+                        episode["content"] = record["content"]
+                    episodes.append(episode)
 
             logger.info(
                 f"Found {len(episodes)} episodes ({processed_count} processed, {pending_count} pending)"
@@ -2307,89 +1644,49 @@ class GraphitiWrapper:
         Delete all episodes for a specific user and file_name,
         and cleanup orphaned nodes and edges.
         """
+        return await self.delete_files_episodes(user_id, [file_name])
+
+    async def delete_files_episodes(self, user_id: str, file_names: List[str]) -> bool:
+        """
+        Delete all episodes for a specific user from any of file_names,
+        and cleanup orphaned nodes and edges. All files are deleted in one
+        query, so the orphan cleanup visits the union of their entities once.
+        """
         try:
             logger.info(
-                f"Deleting all episodes for user {user_id} with file_name: {file_name}"
+                f"Deleting all episodes for user {user_id} with file_names: {file_names}"
             )
             driver = self.client.driver
 
-            # Step 1: Find episodes and identify orphaned entities
-            query1 = """
-            // Find all episodes matching file_name and user_id
-            MATCH (e:Episodic)
-            WHERE e.file_name = $file_name AND (e.name STARTS WITH $user_prefix OR e.group_id = $user_id)
-            
-            // Collect uuid for logging
-            WITH e, e.uuid as uuid
-            
-            // Find all entities mentioned by these episodes
-            OPTIONAL MATCH (e)-[:MENTIONS]->(entity:Entity)
-            WITH collect(DISTINCT e) as target_episodes, collect(DISTINCT entity) as file_entities
-            
-            // Delete the episodes first
-            FOREACH (ep IN target_episodes | DETACH DELETE ep)
-            
-            // Check which entities became orphaned (no other episodes mention them)
-            WITH file_entities, size(file_entities) as total_entities
-            UNWIND file_entities as entity
-            OPTIONAL MATCH (entity)<-[:MENTIONS]-(other_episode:Episodic)
-            WITH entity, total_entities, count(other_episode) as other_refs
-            WHERE other_refs = 0
-            
-            // Delete orphaned entities
-            WITH collect(entity) as orphaned_entities, total_entities
-            FOREACH (orphan IN orphaned_entities | DETACH DELETE orphan)
-            
-            RETURN size(orphaned_entities) as deleted_entities, total_entities as sampled_entities
-            """
-
-            result1 = await driver.execute_query(
-                query1,
+            # Step 1: Delete the episodes, orphaned entities and their edges
+            result = await driver.execute_query(
+                _Q_DELETE_FILE_EPISODES,
                 user_id=user_id,
-                user_prefix=f"{user_id}_",
-                file_name=file_name,
+                file_names=file_names,
                 database_="neo4j",
             )
 
-            deleted_entities = (
-                result1.records[0]["deleted_entities"] if result1.records else 0
-            )
-
-            # Step 2: Cleanup any orphaned RELATES_TO relationships
-            query2 = """
-            MATCH ()-[r:RELATES_TO]->()
-            WITH r, startNode(r) as start_entity, endNode(r) as end_entity
-            OPTIONAL MATCH (start_entity)<-[:MENTIONS]-(e1:Episodic)
-            OPTIONAL MATCH (end_entity)<-[:MENTIONS]-(e2:Episodic)
-            WITH r, count(e1) as start_refs, count(e2) as end_refs
-            WHERE start_refs = 0 OR end_refs = 0
-            DELETE r
-            RETURN count(r) as deleted_edges
-            """
-
-            result2 = await driver.execute_query(query2, database_="neo4j")
-
-            deleted_edges = (
-                result2.records[0]["deleted_edges"] if result2.records else 0
-            )
+            record = result.records[0] if result.records else {}
+            deleted_entities = record.get("deleted_entities", 0)
+            deleted_edges = record.get("deleted_edges", 0)
 
-            # Step 3: Cleanup PendingEpisodes
-            query3 = """
-            MATCH (p:PendingEpisode {user_id: $user_id, file_name: $file_name})
-            DETACH DELETE p
-            RETURN count(p) as pending_deleted
-            """
+            # Step 2: Cleanup PendingEpisodes
             await driver.execute_query(
-                query3, user_id=user_id, file_name=file_name, database_="neo4j"
+                _Q_DELETE_FILE_PENDING_EPISODES,
+                user_id=user_id,
+                file_names=file_names,
+                database_="neo4j",
             )
 
             logger.info(
-                f"Bulk deleted for file '{file_name}': {deleted_entities} entities, {deleted_edges} orphaned edges"
+                f"Bulk deleted for files {file_names}: {deleted_entities} entities, {deleted_edges} orphaned edges"
             )
+            self.invalidate_user(user_id)
+            await self.bump_graph_version(user_id)
             return True
 
         except Exception as e:
-            logger.error(f"Error in bulk deletion for file {file_name}: {e}")
+            logger.error(f"Error in bulk deletion for files {file_names}: {e}")
             raise e
 
     async def delete_episode(self, episode_uuid: str) -> bool:
@@ -2406,68 +1703,28 @@ class GraphitiWrapper:
             logger.info(f"Deleting episode: {episode_uuid}")
             driver = self.client.driver
 
-            # Step 1: Delete episode and orphaned entities
-            query1 = """
-            // Find the episode to delete
-            MATCH (e:Episodic {uuid: $uuid})
-            
-            // Find all entities mentioned by this episode
-            OPTIONAL MATCH (e)-[:MENTIONS]->(entity:Entity)
-            WITH e, collect(DISTINCT entity) as episode_entities
-            
-            // Delete the episode first
-            DETACH DELETE e
-            
-            // Check which entities became orphaned (no other episodes mention them)
-            WITH episode_entities
-            UNWIND episode_entities as entity
-            OPTIONAL MATCH (entity)<-[:MENTIONS]-(other_episode:Episodic)
-            WITH entity, count(other_episode) as other_refs
-            WHERE other_refs = 0
-            
-            // Delete orphaned entities (DETACH DELETE removes their RELATES_TO edges too)
-            WITH collect(entity) as orphaned_entities
-            FOREACH (orphan IN orphaned_entities | DETACH DELETE orphan)
-            
-            RETURN size(orphaned_entities) as deleted_entities
-            """
-
-            result1 = await driver.execute_query(
-                query1, uuid=episode_uuid, database_="neo4j"
-            )
-
-            deleted_entities = (
-                result1.records[0]["deleted_entities"] if result1.records else 0
+            # Delete the episode, orphaned entities and their edges
+            result = await driver.execute_query(
+                _Q_DELETE_EPISODE, uuid=episode_uuid, database_="neo4j"
             )
 
-            # Step 2: Cleanup any orphaned RELATES_TO relationships
-            # (edges that point to non-existent entities or are not connected to any episodes)
-            query2 = """
-            // Find all RELATES_TO relationships
-            MATCH ()-[r:RELATES_TO]->()
-            
-            // Check if both nodes exist and are mentioned by at least one episode
-            WITH r, startNode(r) as start_entity, endNode(r) as end_entity
-            OPTIONAL MATCH (start_entity)<-[:MENTIONS]-(e1:Episodic)
-            OPTIONAL MATCH (end_entity)<-[:MENTIONS]-(e2:Episodic)
-            WITH r, count(e1) as start_refs, count(e2) as end_refs
-            
-            // Delete relationship if either node is not mentioned by any episode
-            WHERE start_refs = 0 OR end_refs = 0
-            DELETE r
-            
-            RETURN count(r) as deleted_edges
-            """
+            if not result.records:
+                # Nothing was deleted, so no user's cached reads are stale
+                logger.info(f"Episode {episode_uuid} not found, nothing to delete")
+                return True
 
-            result2 = await driver.execute_query(query2, database_="neo4j")
-
-            deleted_edges = (
-                result2.records[0]["deleted_edges"] if result2.records else 0
-            )
+            record = result.records[0]
+            deleted_entities = record.get("deleted_entities", 0)
+            deleted_edges = record.get("deleted_edges", 0)
+            # Episodes stored before group_id was set have no known owner,
+            # so all cached reads are dropped for them
+            owner = record.get("owner")
 
             logger.info(
                 f"Deleted episode {episode_uuid}: {deleted_entities} entities, {deleted_edges} orphaned edges"
             )
+            self.invalidate_user(owner)
+            await self.bump_graph_version(owner)
             return True
 
         except Exception as e:
@@ -2478,6 +1735,8 @@ class GraphitiWrapper:
         """Close the Graphiti client connection"""
         try:
             await self.client.close()
+            await self.client.cross_encoder.close()
+            await self._redis.aclose()
             logger.info("Graphiti client connection closed")
         except Exception as e:
             logger.error(f"Error closing Graphiti client: {e}")
@@ -2,15 +2,65 @@
 Service for reprocessing episodes to rebuild knowledge graph
 """
 
+import asyncio
 import logging
-from typing import Dict, Any
+import uuid
+from typing import Dict, Any, Optional
+from redis import Redis
+from rq import Queue
+from rq.job import Dependency, Job
+from app.core.config import settings
 from app.services.graphiti_client import graphiti_client
+from app.services.worker_tasks import cleanup_reprocessed_user, process_episode
 
 logger = logging.getLogger(__name__)
 
+# Duplicate episodes deleted per transaction, so large users don't build
+# one huge transaction in the Neo4j heap
+CLEANUP_BATCH_SIZE = 10000
+
+# Queued reprocessing: RQ queue the worker listens on, seconds one episode
+# job may run, and seconds job results (and the batch) stay pollable
+REPROCESS_QUEUE = 'default'
+REPROCESS_JOB_TIMEOUT = 600
+REPROCESS_RESULT_TTL = 24 * 3600
+
+# All episodes of a user, oldest first
+_Q_USER_EPISODES = """
+MATCH (e:Episodic)
+WHERE e.group_id = $user_id
+RETURN e.uuid as uuid, e.content as content, e.created_at as created_at,
+       e.source as source, e.file_name as file_name
+ORDER BY e.created_at ASC
+"""
+
 class ReprocessingService:
     """Service to reprocess existing episodes and rebuild knowledge graph"""
     
+    def __init__(self):
+        # Created on first use, so importing the service needs no Redis
+        self._queue: Optional[Queue] = None
+    
+    @property
+    def queue(self) -> Queue:
+        """RQ queue for reprocessing jobs"""
+        if self._queue is None:
+            self._queue = Queue(
+                REPROCESS_QUEUE,
+                connection=Redis.from_url(settings.REDIS_URL)
+            )
+        return self._queue
+    
+    @staticmethod
+    def _episode_metadata(episode) -> Dict[str, Any]:
+        """add_episode metadata carried over from a stored episode"""
+        metadata = {}
+        if episode.get('file_name'):
+            metadata['file_name'] = episode['file_name']
+        if episode.get('source'):
+            metadata['source'] = episode['source']
+        return metadata
+    
     async def reprocess_user(self, user_id: str) -> Dict[str, Any]:
         """
         Reprocess all episodes for a specific user
@@ -24,60 +74,48 @@ class ReprocessingService:
         try:
             driver = graphiti_client.client.driver
             
-            # Get all episodes for this user
-            query = """
-            MATCH (e:Episodic)
-            WHERE e.name STARTS WITH $user_prefix
-            RETURN e.uuid as uuid, e.content as content, e.created_at as created_at, 
-                   e.source as source, e.file_name as file_name
-            ORDER BY e.created_at ASC
-            """
-            
-            result = await driver.execute_query(
-                query,
-                user_prefix=f"{user_id}_",
-                database_="neo4j"
-            )
-            
-            episodes = result.records
-            total = len(episodes)
+            total = 0
             processed = 0
             errors = 0
             
-            logger.info(f"Starting reprocessing {total} episodes for user {user_id}")
+            logger.info(f"Starting reprocessing episodes for user {user_id}")
             logger.info(f"SAFE MODE: NOT deleting existing episodes, only adding Entity nodes")
             
             # SAFETY: We do NOT delete old episodes anymore!
             # Just process each episode to create Entity nodes
             # This is safe - if reprocessing fails, original episodes remain intact
             
-            # Process each episode
-            for i, episode in enumerate(episodes):
-                try:
-                    logger.info(f"Reprocessing episode {i+1}/{total} for user {user_id}")
-                    
-                    # Use the existing add_episode method which will:
-                    # 1. Create new Episodic node (may be duplicate - OK!)
-                    # 2. Extract entities with LLM
-                    # 3. Create Entity nodes and relationships
-                    metadata = {}
-                    if episode.get('file_name'):
-                        metadata['file_name'] = episode['file_name']
-                    if episode.get('source'):
-                        metadata['source'] = episode['source']
-                    
-                    await graphiti_client.add_episode(
-                        user_id=user_id,
-                        text=episode['content'],
-                        metadata=metadata
-                    )
-                    
-                    processed += 1
-                    
-                except Exception as e:
-                    logger.error(f"Error reprocessing episode {episode['uuid']}: {e}")
-                    errors += 1
-                    # Continue with next episode
+            # Episodes are re-added one at a time, oldest first: each one
+            # resolves entities and invalidates edges against the graph left
+            # by the ones before it, so concurrent add_episode calls for one
+            # group_id would race on dedup. Concurrency is across users only
+            # (REPROCESS_CONCURRENCY in reprocess_all_users).
+            #
+            # Episodes are streamed instead of loaded up front, so only the
+            # current episode body is held in memory. ORDER BY sorts the full
+            # set before the first row is sent, so episodes added meanwhile
+            # are not picked up again.
+            async with driver.session() as session:
+                result = await session.run(_Q_USER_EPISODES, user_id=user_id)
+                async for episode in result:
+                    total += 1
+                    try:
+                        logger.info(f"Reprocessing episode {total} for user {user_id}")
+                        
+                        # Use the existing add_episode method which will:
+                        # 1. Create new Episodic node (may be duplicate - OK!)
+                        # 2. Extract entities with LLM
+                        # 3. Create Entity nodes and relationships
+                        await graphiti_client.add_episode(
+                            user_id=user_id,
+                            text=episode['content'],
+                            metadata=self._episode_metadata(episode)
+                        )
+                        processed += 1
+                    except Exception as e:
+                        # A failed episode doesn't stop the others
+                        logger.error(f"Error reprocessing episode {episode['uuid']}: {e}")
+                        errors += 1
             
             logger.info(f"Reprocessing complete for user {user_id}: {processed} processed, {errors} errors")
             
@@ -98,6 +136,121 @@ class ReprocessingService:
             logger.error(f"Error reprocessing user {user_id}: {e}", exc_info=True)
             raise
     
+    async def enqueue_user(self, user_id: str) -> Dict[str, Any]:
+        """
+        Queue one RQ job per episode of a user, so the worker reprocesses
+        them instead of the API process. Each job depends on the previous
+        one: like reprocess_user, a user's episodes run one at a time and
+        oldest first, whatever the number of workers. A final job removes
+        the duplicates once every episode job has run.
+        
+        Args:
+            user_id: User identifier
+            
+        Returns:
+            Batch id and episode count; poll with get_batch_status()
+        """
+        try:
+            driver = graphiti_client.client.driver
+            batch_id = uuid.uuid4().hex
+            
+            job_datas = []
+            async with driver.session() as session:
+                result = await session.run(_Q_USER_EPISODES, user_id=user_id)
+                async for episode in result:
+                    i = len(job_datas)
+                    job_datas.append(Queue.prepare_data(
+                        process_episode,
+                        args=(user_id, episode['content'], self._episode_metadata(episode)),
+                        job_id=f"reprocess-{batch_id}-{i}",
+                        # Concurrent add_episode calls for one user race on
+                        # entity dedup; a failed episode doesn't stop the rest
+                        depends_on=Dependency(
+                            jobs=[f"reprocess-{batch_id}-{i - 1}"],
+                            allow_failure=True
+                        ) if i else None,
+                        timeout=REPROCESS_JOB_TIMEOUT,
+                        result_ttl=REPROCESS_RESULT_TTL,
+                        failure_ttl=REPROCESS_RESULT_TTL
+                    ))
+            
+            total = len(job_datas)
+            if total:
+                # Redis client is blocking: enqueue off the event loop,
+                # all jobs in one pipelined round trip
+                await asyncio.to_thread(self._enqueue_batch, batch_id, user_id, job_datas)
+            
+            logger.info(f"Queued {total} episodes for reprocessing user {user_id} (batch {batch_id})")
+            
+            return {
+                "user_id": user_id,
+                "batch_id": batch_id,
+                "total_episodes": total,
+                "status": "queued" if total else "empty"
+            }
+            
+        except Exception as e:
+            logger.error(f"Error queueing reprocessing for user {user_id}: {e}", exc_info=True)
+            raise
+    
+    def _enqueue_batch(self, batch_id: str, user_id: str, job_datas: list):
+        queue = self.queue
+        jobs = queue.enqueue_many(job_datas)
+        # Cleanup runs after all episode jobs, even if some of them failed
+        queue.enqueue(
+            cleanup_reprocessed_user,
+            user_id,
+            job_id=f"reprocess-{batch_id}-cleanup",
+            depends_on=Dependency(jobs=jobs, allow_failure=True),
+            result_ttl=REPROCESS_RESULT_TTL,
+            failure_ttl=REPROCESS_RESULT_TTL
+        )
+        queue.connection.set(
+            f"reprocess:{batch_id}",
+            f"{user_id}:{len(jobs)}",
+            ex=REPROCESS_RESULT_TTL
+        )
+    
+    async def get_batch_status(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Job counts of a batch queued by enqueue_user, by RQ status
+        
+        Args:
+            batch_id: Batch identifier returned by enqueue_user
+            
+        Returns:
+            Batch statistics, or None if the batch is unknown or expired
+        """
+        return await asyncio.to_thread(self._batch_status, batch_id)
+    
+    def _batch_status(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        connection = self.queue.connection
+        batch = connection.get(f"reprocess:{batch_id}")
+        if batch is None:
+            return None
+        user_id, total = batch.decode().rsplit(':', 1)
+        total = int(total)
+        
+        # Job ids follow from the batch id: fetch them all in one pipeline
+        job_ids = [f"reprocess-{batch_id}-{i}" for i in range(total)]
+        jobs = Job.fetch_many(job_ids + [f"reprocess-{batch_id}-cleanup"], connection=connection)
+        
+        statuses: Dict[str, int] = {}
+        for job in jobs[:-1]:
+            status = job.get_status(refresh=False) if job else 'expired'
+            statuses[status] = statuses.get(status, 0) + 1
+        cleanup = jobs[-1]
+        
+        return {
+            "user_id": user_id,
+            "batch_id": batch_id,
+            "total_episodes": total,
+            "processed": statuses.pop('finished', 0),
+            "errors": statuses.pop('failed', 0),
+            "statuses": statuses,
+            "cleanup": cleanup.get_status(refresh=False) if cleanup else 'expired'
+        }
+    
     async def _cleanup_duplicate_episodes(self, user_id: str) -> dict:
         """
         Remove duplicate episodes after reprocessing.
@@ -108,25 +261,32 @@ class ReprocessingService:
         try:
             driver = graphiti_client.client.driver
             
-            # Find and delete episodes without MENTIONS relationships
+            # Find and delete episodes without MENTIONS relationships,
+            # committing every CLEANUP_BATCH_SIZE deletions
             cleanup_query = """
             MATCH (e:Episodic)
-            WHERE e.name STARTS WITH $user_prefix
+            WHERE e.group_id = $user_id
             AND NOT EXISTS {
                 MATCH (e)-[:MENTIONS]->(:Entity)
             }
-            WITH e
-            DETACH DELETE e
-            RETURN count(e) as deleted
+            CALL {
+                WITH e
+                DETACH DELETE e
+            } IN TRANSACTIONS OF $batch_size ROWS
+            RETURN count(*) as deleted
             """
             
-            result = await driver.execute_query(
-                cleanup_query,
-                user_prefix=f"{user_id}_",
-                database_="neo4j"
-            )
+            # CALL ... IN TRANSACTIONS needs an auto-commit transaction,
+            # which execute_query doesn't use, so run it on a session
+            async with driver.session() as session:
+                result = await session.run(
+                    cleanup_query,
+                    user_id=user_id,
+                    batch_size=CLEANUP_BATCH_SIZE
+                )
+                record = await result.single()
             
-            deleted_count = result.records[0]['deleted'] if result.records else 0
+            deleted_count = record['deleted'] if record else 0
             
             return {
                 "deleted": deleted_count,
@@ -151,12 +311,13 @@ class ReprocessingService:
         try:
             driver = graphiti_client.client.driver
             
-            # Get all unique user IDs from episodes
+            # Get all unique user IDs from episodes. group_id > '' skips
+            # missing and empty ids as one range predicate, which the
+            # Episodic group_id index answers in order (no scan, no sort)
             query = """
             MATCH (e:Episodic)
-            WHERE e.name IS NOT NULL
-            WITH split(e.name, '_')[0] as user_id
-            RETURN DISTINCT user_id
+            WHERE e.group_id > ''
+            RETURN DISTINCT e.group_id as user_id
             ORDER BY user_id
             """
             
@@ -170,16 +331,34 @@ class ReprocessingService:
             
             logger.info(f"Starting reprocessing for {total_users} users")
             
+            # Users are independent: reprocess REPROCESS_CONCURRENCY at a time
+            semaphore = asyncio.Semaphore(settings.REPROCESS_CONCURRENCY)
+            
+            async def reprocess_one(i, user_id):
+                async with semaphore:
+                    logger.info(f"Processing user {i+1}/{total_users}: {user_id}")
+                    return await self.reprocess_user(user_id)
+            
+            outcomes = await asyncio.gather(
+                *(reprocess_one(i, user_id) for i, user_id in enumerate(user_ids)),
+                return_exceptions=True
+            )
+            
+            # A failed user counts as one error instead of aborting the run
             results = []
-            for i, user_id in enumerate(user_ids):
-                logger.info(f"Processing user {i+1}/{total_users}: {user_id}")
-                user_result = await self.reprocess_user(user_id)
-                results.append(user_result)
+            failed_users = 0
+            for user_id, outcome in zip(user_ids, outcomes):
+                if isinstance(outcome, Exception):
+                    failed_users += 1
+                    results.append({"user_id": user_id, "error": str(outcome)})
+                else:
+                    results.append(outcome)
             
             # Calculate totals
-            total_episodes = sum(r['total_episodes'] for r in results)
-            total_processed = sum(r['processed'] for r in results)
-            total_errors = sum(r['errors'] for r in results)
+            succeeded = [r for r in results if "error" not in r]
+            total_episodes = sum(r['total_episodes'] for r in succeeded)
+            total_processed = sum(r['processed'] for r in succeeded)
+            total_errors = sum(r['errors'] for r in succeeded) + failed_users
             
             return {
                 "total_users": total_users,
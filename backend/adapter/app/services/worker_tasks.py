@@ -15,16 +15,19 @@ async def process_episode(user_id: str, text: str, metadata: dict):
     """
     logger.info(f"Processing episode for user {user_id}")
     
-    # Example logic:
-    # 1. Get embedding
-    # embedding = await embedding_service.get_embedding(text)
-    
-    # 2. Add to Graphiti (if not already done synchronously)
-    # Since the prompt says "Adapter returns ok synchronously... then asynchronously launches tasks",
-    # we might move the actual Graphiti add here, OR just the enrichment.
-    # For now, let's assume we do enrichment here.
+    # Graphiti embeds the episode and extracts entities itself
+    await graphiti_client.add_episode(user_id=user_id, text=text, metadata=metadata)
+
+async def cleanup_reprocessed_user(user_id: str):
+    """
+    Background task run after a user's queued reprocessing jobs:
+    removes the old episodes the reprocessed copies replace.
+    """
+    # Imported here: reprocessing_service imports this module to queue jobs
+    from app.services.reprocessing_service import reprocessing_service
     
-    pass
+    logger.info(f"Cleaning up reprocessed episodes for user {user_id}")
+    return await reprocessing_service._cleanup_duplicate_episodes(user_id)
 
 async def reindex_user(user_id: str):
     logger.info(f"Reindexing user {user_id}")
@@ -1,59 +1,75 @@
 
 import pytest
+import pytest_asyncio
+from httpx import AsyncClient, ASGITransport
+from pytest_asyncio import is_async_test
 from unittest.mock import AsyncMock, MagicMock
 from app.main import app
-from app.services.graphiti_client import graphiti_client
+from app.services.graphiti_client import GraphitiWrapper
 from app.core.auth import get_api_key
 
+def pytest_collection_modifyitems(items):
+    """
+    Run every async test on one session-wide event loop instead of a new
+    loop per test, which also lets the async fixtures below be shared.
+    """
+    session_loop = pytest.mark.asyncio(scope="session")
+    for item in items:
+        if is_async_test(item):
+            item.add_marker(session_loop, append=False)
+
+@pytest_asyncio.fixture(scope="session")
+async def client():
+    """
+    One AsyncClient for every API test. Requests are independent calls
+    against the same ASGI app, so nothing leaks between tests.
+    """
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
+
+# Built once; the mock_graphiti fixture hands out this same object with its
+# call history reset, instead of wiring a new MagicMock for every test.
+# The spec rejects methods GraphitiWrapper doesn't have and makes its async
+# methods AsyncMocks; `client` is an instance attribute, so it is added here.
+_MOCK_GRAPHITI = MagicMock(spec=GraphitiWrapper)
+_MOCK_GRAPHITI.client = MagicMock()
+_MOCK_GRAPHITI_METHODS = {
+    "get_user_episodes": AsyncMock(return_value=[]),
+    "add_episode": AsyncMock(return_value="test_uuid"),
+    "search": AsyncMock(return_value=[]),
+    "get_user_graph": AsyncMock(return_value={"nodes": [], "edges": []}),
+    "save_pending_episode": AsyncMock(),
+    "delete_pending_episode": AsyncMock(),
+    "delete_file_episodes": AsyncMock(return_value=True),
+    "delete_files_episodes": AsyncMock(return_value=True),
+}
+_MOCK_GRAPHITI_RETURNS = {
+    name: method.return_value for name, method in _MOCK_GRAPHITI_METHODS.items()
+}
+
 @pytest.fixture
 def mock_graphiti():
     """
     Mock the graphiti client to prevent actual DB calls.
     """
-    # Create a mock object that mimics GraphitiWrapper
-    mock = MagicMock()
-    
-    # Mock async methods
-    mock.get_user_episodes = AsyncMock(return_value=[])
-    mock.add_episode = AsyncMock(return_value="test_uuid")
-    mock.search = AsyncMock(return_value=[])
-    mock.get_user_graph = AsyncMock(return_value={"nodes": [], "edges": []})
-    mock.save_pending_episode = AsyncMock()
-    mock.delete_pending_episode = AsyncMock()
-    mock.delete_file_episodes = AsyncMock(return_value=True)
-    
-    # Replace the actual client instance with our mock
-    # We need to monkeypatch the module-level variable
-    original_client = graphiti_client
-    
-    # Since graphiti_client is imported in api/v1/memory.py, we should patch it there?
-    # Actually, usually patching where it is used is best, but for global singleton, 
-    # we can try to patch the instance attributes.
-    
-    # Better approach for singleton:
-    # We will use dependency override or direct patching.
-    # Since the code imports the instance `graphiti_client`, we can just modify its methods?
-    # No, safer to return a mock and let `override_dependencies` use it, 
-    # OR rely on `unittest.mock.patch` in the tests.
-    
-    # However, the test signature asks for `mock_graphiti` fixture.
-    
-    return mock
+    # Put back any method a previous test replaced, with fresh call records
+    # and its default result
+    for name, method in _MOCK_GRAPHITI_METHODS.items():
+        method.reset_mock(side_effect=True)
+        method.return_value = _MOCK_GRAPHITI_RETURNS[name]
+        setattr(_MOCK_GRAPHITI, name, method)
+    _MOCK_GRAPHITI.reset_mock()
+    return _MOCK_GRAPHITI
 
 @pytest.fixture
-def override_dependencies(mock_graphiti):
+def override_dependencies(mock_graphiti, monkeypatch):
     """
     Override FastAPI dependencies.
     """
-    # Override API key dependency
-    app.dependency_overrides[get_api_key] = lambda: "test_key"
+    # Override API key dependency (removed again when the test ends)
+    monkeypatch.setitem(app.dependency_overrides, get_api_key, lambda: "test_key")
     
     # We also need to patch the graphiti_client used by the app.
     # Since it's a global imported instance, we can patch `app.api.v1.memory.graphiti_client`
-    with pytest.MonkeyPatch.context() as m:
-        m.setattr("app.api.v1.memory.graphiti_client", mock_graphiti)
-        m.setattr("app.api.v1.admin.graphiti_client", mock_graphiti)
-        yield
-    
-    # Clean up
-    app.dependency_overrides = {}
+    monkeypatch.setattr("app.api.v1.memory.graphiti_client", mock_graphiti)
+    monkeypatch.setattr("app.api.v1.admin.graphiti_client", mock_graphiti)
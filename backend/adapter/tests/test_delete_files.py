@@ -0,0 +1,15 @@
+import pytest
+
+@pytest.mark.asyncio
+async def test_delete_files_passes_all_file_names(client, mock_graphiti, override_dependencies):
+    """
+    Test that repeated file_name parameters are deleted in a single call.
+    """
+    response = await client.delete(
+        "/memory/files",
+        params=[("user_id", "test_user"), ("file_name", "a.txt"), ("file_name", "b.txt")],
+        headers={"X-API-Key": "test_key"}
+    )
+
+    assert response.status_code == 200
+    mock_graphiti.delete_files_episodes.assert_called_once_with("test_user", ["a.txt", "b.txt"])
@@ -0,0 +1,64 @@
+import json
+from app.services._http_transports import (
+    _clean_llm_content,
+    _close_truncated_json,
+    _fix_llm_json_shape,
+    _locate_json_span,
+)
+
+
+def test_fix_shape_renames_top_level_and_entity_keys():
+    parsed, modified = _fix_llm_json_shape(
+        {"entities": [{"entity_name": "Alice"}], "facts": []}
+    )
+    assert modified
+    assert parsed == {"extracted_entities": [{"name": "Alice"}], "edges": []}
+
+
+def test_fix_shape_leaves_valid_response_untouched():
+    parsed, modified = _fix_llm_json_shape({"extracted_entities": [{"name": "Bob"}]})
+    assert not modified
+    assert parsed == {"extracted_entities": [{"name": "Bob"}]}
+
+
+def test_clean_content_is_path_independent():
+    """Both transport paths run the same cleanup"""
+    for content in ('```json\n[{"name": "x"}]\n```', '"a string"', '{"facts": [1]}'):
+        assert _clean_llm_content(content, "standard") == _clean_llm_content(
+            content, "non-standard"
+        )
+    assert json.loads(_clean_llm_content('{"facts": [1]}', "standard")) == {
+        "edges": [1]
+    }
+
+
+def test_locate_json_span_stops_at_matching_close():
+    s = 'Result: {"a": "}", "b": [1]} see {"other": 2}'
+    start, end = _locate_json_span(s)
+    assert json.loads(s[start:end]) == {"a": "}", "b": [1]}
+
+
+def test_locate_json_span_truncated_falls_back_to_last_close():
+    s = '{"extracted_entities": [{"name": "a"}, {"na'
+    start, end = _locate_json_span(s)
+    assert s[start:end] == '{"extracted_entities": [{"name": "a"}'
+    assert _locate_json_span("no json here") is None
+
+
+def test_close_truncated_json():
+    assert _close_truncated_json('{"a": [1, {"b": "x') == '{"a": [1, {"b": "x"}]}'
+    assert _close_truncated_json('{"a": [1, 2,') == '{"a": [1, 2]}'
+    assert _close_truncated_json('{"a": 1, "b":') == '{"a": 1, "b":null}'
+    assert _close_truncated_json('{"a": 1}') is None
+
+
+def test_plain_text_is_wrapped_json_with_leading_whitespace_is_not():
+    wrapped = json.loads(_clean_llm_content("  Alice met Bob.\n", "standard"))
+    assert wrapped == {
+        "summary": "Alice met Bob.",
+        "extracted_entities": [],
+        "edges": [],
+    }
+    assert json.loads(_clean_llm_content('\n  {"edges": []}', "standard")) == {
+        "edges": []
+    }
@@ -0,0 +1,17 @@
+import time
+import pytest
+from app.services._http_transports import AsyncTokenBucket
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_allows_burst_then_waits():
+    """Acquisitions beyond capacity wait for the bucket to refill"""
+    bucket = AsyncTokenBucket(rate=20, capacity=2)
+
+    start = time.monotonic()
+    await bucket.acquire()
+    await bucket.acquire()
+    assert time.monotonic() - start < 0.02
+
+    await bucket.acquire()
+    assert time.monotonic() - start >= 0.04
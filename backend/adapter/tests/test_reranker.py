@@ -0,0 +1,52 @@
+import asyncio
+import json
+import pytest
+import httpx
+from app.services.graphiti_client import RemoteRerankerClient
+
+
+def make_reranker(requests):
+    """Reranker whose HTTP client scores each document by its length"""
+
+    def handler(request):
+        body = json.loads(request.content)
+        requests.append(body)
+        results = [
+            {"index": i, "relevance_score": len(doc)}
+            for i, doc in enumerate(body["documents"])
+        ]
+        return httpx.Response(200, json={"results": results})
+
+    reranker = RemoteRerankerClient("http://reranker", "test-key", "reranker-001")
+    reranker.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return reranker
+
+
+@pytest.mark.asyncio
+async def test_concurrent_same_query_is_coalesced():
+    """Concurrent rank() calls for one query share a single rerank request"""
+    requests = []
+    reranker = make_reranker(requests)
+
+    edges, nodes, other = await asyncio.gather(
+        reranker.rank("query", ["a", "bbb"]),
+        reranker.rank("query", ["cc"]),
+        reranker.rank("other query", ["dddd"]),
+    )
+
+    assert edges == [("bbb", 3.0), ("a", 1.0)]
+    assert nodes == [("cc", 2.0)]
+    assert other == [("dddd", 4.0)]
+    assert [r["documents"] for r in requests] == [["a", "bbb", "cc"], ["dddd"]]
+
+
+@pytest.mark.asyncio
+async def test_top_n_is_sent_to_server_and_applied():
+    """A single caller's top_n is forwarded to the server, results are trimmed"""
+    requests = []
+    reranker = make_reranker(requests)
+
+    ranked = await reranker.rank("query", ["a", "bbb", "cc"], top_n=2)
+
+    assert ranked == [("bbb", 3.0), ("cc", 2.0)]
+    assert requests[0]["top_n"] == 2
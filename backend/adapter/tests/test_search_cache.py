@@ -0,0 +1,119 @@
+import pytest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.services.graphiti_client import GraphitiWrapper
+
+
+def make_wrapper():
+    """Wrapper whose Graphiti client returns one edge and a fixed embedding"""
+    wrapper = GraphitiWrapper()
+    edge = SimpleNamespace(
+        fact="Alice likes tea",
+        uuid="edge-1",
+        episodes=["ep-1"],
+        score=0.9,
+        created_at=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        source_node_uuid="n1",
+        target_node_uuid="n2",
+        valid_at=None,
+        invalid_at=None,
+    )
+    client = MagicMock()
+    client.search_ = AsyncMock(return_value=SimpleNamespace(edges=[edge]))
+    client.driver.execute_query = AsyncMock(
+        return_value=SimpleNamespace(records=[{"uuid": "ep-1", "file_name": None}])
+    )
+    client.embedder.create = AsyncMock(return_value=[1.0, 0.0])
+    wrapper.client = client
+    # Shared (Redis) graph versions: user and global counters
+    wrapper._redis = AsyncMock()
+    wrapper._redis.mget = AsyncMock(return_value=[b"0", None])
+    return wrapper
+
+
+@pytest.mark.asyncio
+async def test_search_results_cached_until_user_changes():
+    wrapper = make_wrapper()
+
+    first = await wrapper.search("user", "tea", limit=5)
+    second = await wrapper.search("user", "tea", limit=5)
+    assert [h.uuid for h in second] == [h.uuid for h in first] == ["edge-1"]
+    assert wrapper.client.search_.call_count == 1
+
+    wrapper.invalidate_user("user")
+    await wrapper.search("user", "tea", limit=5)
+    assert wrapper.client.search_.call_count == 2
+
+    # A write by another process only bumps the shared version
+    wrapper._redis.mget.return_value = [b"1", None]
+    await wrapper.search("user", "tea", limit=5)
+    assert wrapper.client.search_.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_semantic_cache_reuses_similar_query():
+    wrapper = make_wrapper()
+
+    with patch("app.services.graphiti_client.settings.SEARCH_SEMANTIC_CACHE_THRESHOLD", 0.95):
+        await wrapper.search("user", "tea", limit=5)
+        hits = await wrapper.search("user", "what tea", limit=5)
+
+    assert [h.uuid for h in hits] == ["edge-1"]
+    assert wrapper.client.search_.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_reranker_failure_skips_reranker_until_backoff_expires():
+    wrapper = make_wrapper()
+    edges = (await wrapper.client.search_()).edges
+    wrapper.client.search_ = AsyncMock(side_effect=RuntimeError("reranker down"))
+    wrapper.client.search = AsyncMock(return_value=edges)
+
+    await wrapper.search("user", "tea", limit=5)
+    hits = await wrapper.search("user", "coffee", limit=5)
+    assert [h.uuid for h in hits] == ["edge-1"]
+    assert wrapper.client.search_.call_count == 1
+    assert wrapper.client.search.call_count == 2
+
+    wrapper._reranker_failed_until = 0.0
+    await wrapper.search("user", "milk", limit=5)
+    assert wrapper.client.search_.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_episode_file_names_refetched_after_shared_version_bump():
+    """A write by another process (worker, other replica) bumps the Redis version"""
+    wrapper = make_wrapper()
+
+    await wrapper._get_episode_file_names("user", {"ep-1"})
+    await wrapper._get_episode_file_names("user", {"ep-1"})
+    assert wrapper.client.driver.execute_query.call_count == 1
+
+    wrapper._redis.mget.return_value = [b"1", None]
+    await wrapper._get_episode_file_names("user", {"ep-1"})
+    assert wrapper.client.driver.execute_query.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_semantic_cache_embedder_failure_still_searches():
+    wrapper = make_wrapper()
+    wrapper.client.embedder.create = AsyncMock(side_effect=RuntimeError("embedder down"))
+
+    with patch("app.services.graphiti_client.settings.SEARCH_SEMANTIC_CACHE_THRESHOLD", 0.95):
+        hits = await wrapper.search("user", "tea", limit=5)
+
+    assert [h.uuid for h in hits] == ["edge-1"]
+    assert wrapper.client.search_.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_semantic_cache_keeps_most_recent_users():
+    wrapper = make_wrapper()
+
+    with patch("app.services.graphiti_client.settings.SEARCH_SEMANTIC_CACHE_THRESHOLD", 0.95), \
+            patch("app.services.graphiti_client.SEMANTIC_CACHE_USERS", 2):
+        for user_id in ("a", "b", "c"):
+            await wrapper.search(user_id, "tea", limit=5)
+
+    assert list(wrapper._semantic_cache) == ["b", "c"]
@@ -0,0 +1,69 @@
+import importlib.metadata as metadata
+import os
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+from packaging.requirements import Requirement
+from packaging.utils import canonicalize_name
+
+ADAPTER_DIR = Path(__file__).resolve().parents[1]
+ADAPTER_REQUIREMENTS = ADAPTER_DIR / "requirements.txt"
+WORKER_REQUIREMENTS = ADAPTER_DIR.parents[1] / "worker" / "requirements.txt"
+
+def read_requirements(path):
+    return [
+        Requirement(line) for line in path.read_text().splitlines()
+        if line.strip() and not line.startswith("#")
+    ]
+
+def installed_closure(requirements):
+    """Distributions these requirements install, with extras and dependencies"""
+    seen = set()
+    stack = list(requirements)
+    while stack:
+        req = stack.pop()
+        key = (canonicalize_name(req.name), frozenset(req.extras))
+        if key in seen:
+            continue
+        seen.add(key)
+        try:
+            requires = metadata.requires(req.name) or []
+        except metadata.PackageNotFoundError:
+            continue
+        for spec in requires:
+            dep = Requirement(spec)
+            extras = req.extras or {""}
+            if dep.marker is None or any(dep.marker.evaluate({"extra": e}) for e in extras):
+                stack.append(dep)
+    return {name for name, _ in seen}
+
+@pytest.mark.skipif(not WORKER_REQUIREMENTS.exists(), reason="worker/ not checked out")
+def test_worker_requirements_cover_worker_tasks_imports():
+    """
+    The worker image runs app.services.worker_tasks with only
+    worker/requirements.txt installed. Import it in a fresh interpreter
+    (building the GraphitiWrapper and its transports) and check that every
+    adapter dependency it loads is also installed by the worker.
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", "import sys, app.services.worker_tasks; print(' '.join(sys.modules))"],
+        cwd=ADAPTER_DIR,
+        env={**os.environ, "GRAPHITI_TELEMETRY_ENABLED": "false"},
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+
+    packages = metadata.packages_distributions()
+    loaded = {
+        canonicalize_name(dist)
+        for module in {name.split(".")[0] for name in result.stdout.split()}
+        for dist in packages.get(module, [])
+    }
+    # Only what the adapter declares: other installed packages may be
+    # imported opportunistically without being needed
+    needed = loaded & installed_closure(read_requirements(ADAPTER_REQUIREMENTS))
+    missing = needed - installed_closure(read_requirements(WORKER_REQUIREMENTS))
+    assert not missing, f"worker/requirements.txt lacks {sorted(missing)}"
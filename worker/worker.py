@@ -1,6 +1,8 @@
+import asyncio
 import os
 import redis
-from rq import Worker, Queue, Connection
+from rq import SimpleWorker, Queue
+from rq.job import Job
 import logging
 
 # Setup logging
@@ -9,13 +11,42 @@ logger = logging.getLogger(__name__)
 
 listen = ['default']
 
+# One bounded pool for the process, so reconnects reuse sockets instead
+# of re-parsing the URL and opening a new pool each time
+_POOL = redis.BlockingConnectionPool.from_url(
+    os.getenv('REDIS_URL', 'redis://redis:6379/0'),
+    max_connections=16,
+    timeout=20
+)
+
 def get_redis_connection():
-    redis_url = os.getenv('REDIS_URL', 'redis://redis:6379/0')
-    return redis.from_url(redis_url)
+    return redis.Redis(connection_pool=_POOL)
+
+class LoopJob(Job):
+    """
+    Job that runs coroutine jobs on one event loop for the worker's lifetime.
+    RQ starts a new loop per job, but with SimpleWorker every job shares this
+    process, and the Graphiti client's pooled Neo4j/HTTP connections stay
+    bound to the loop that opened them.
+    """
+    _loop = None
+
+    def _execute(self):
+        result = self.func(*self.args, **self.kwargs)
+        if asyncio.iscoroutine(result):
+            if LoopJob._loop is None:
+                LoopJob._loop = asyncio.new_event_loop()
+            return LoopJob._loop.run_until_complete(result)
+        return result
 
 if __name__ == '__main__':
     logger.info("Starting worker...")
     conn = get_redis_connection()
-    with Connection(conn):
-        worker = Worker(map(Queue, listen))
-        worker.work()
+    # Jobs are I/O-bound (LLM, Neo4j): run them in this process instead of
+    # forking a work horse per job
+    worker = SimpleWorker(
+        [Queue(name, connection=conn) for name in listen],
+        connection=conn,
+        job_class=LoopJob
+    )
+    worker.work()